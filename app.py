@@ -7,8 +7,16 @@ def main():
     Creates the app controller and runs the Dash server.
     """
     cyto.load_extra_layouts()
-    controller = AppController()
+    controller = AppController(debug=True)
     controller.app.run(debug=True)
 
+def create_server():
+    """
+    WSGI entry point for multi-worker deployments, e.g. gunicorn "app:create_server()".
+    Sessions only share immutable datasets, so any number of threads or workers can serve them.
+    """
+    cyto.load_extra_layouts()
+    return AppController().app.server
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
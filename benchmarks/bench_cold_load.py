@@ -0,0 +1,52 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each trial runs in a fresh interpreter so no parsed state is shared between loads
+TRIAL = """
+import time
+from model.data_manager import DataManager
+data_manager = DataManager({data_folder!r})
+data_manager.load_dataset({dataset!r})
+start = time.perf_counter()
+data_manager.load_files(use_bundle={use_bundle!r})
+data_manager.get_clustering(data_manager.get_best_k())
+print("ELAPSED", time.perf_counter() - start)
+"""
+
+
+def run_trial(data_folder, dataset, use_bundle):
+    code = TRIAL.format(data_folder=data_folder, dataset=dataset, use_bundle=use_bundle)
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return float(next(line.split()[1] for line in output.splitlines() if line.startswith("ELAPSED")))
+
+
+def main():
+    """
+    Compare cold-load times of the source text files and the compiled bundle.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("dataset")
+    parser.add_argument("--data-folder", default="data/")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # Make sure the bundle is up to date before timing it
+    subprocess.run([sys.executable, "cli.py", "--data-folder", args.data_folder, "compile", args.dataset],
+                   cwd=ROOT, check=True, capture_output=True)
+
+    results = {"dataset": args.dataset, "repeat": args.repeat}
+    for label, use_bundle in (("text", False), ("bundle", True)):
+        timings = [run_trial(args.data_folder, args.dataset, use_bundle) for _ in range(args.repeat)]
+        results[label] = {"median_s": statistics.median(timings), "min_s": min(timings), "max_s": max(timings)}
+    results["speedup"] = results["text"]["median_s"] / results["bundle"]["median_s"]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import os
+import sys
+import gzip
+import json
+import argparse
+import statistics
+
+import plotly
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from model.dataset_registry import DatasetRegistry
+from view.graph_builder import GraphBuilder
+
+
+def main():
+    """
+    Measure the bytes sent per cluster graph and fail when they exceed a budget.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("dataset", nargs="?", default="RoadTraffic")
+    parser.add_argument("--data-folder", default="data/")
+    parser.add_argument("--ks", type=int, nargs="*", default=None, help="k values to measure, every k by default")
+    parser.add_argument("--budget", type=int, default=2048, help="Largest allowed mean bytes per graph, uncompressed")
+    args = parser.parse_args()
+
+    graph_builder = GraphBuilder(DatasetRegistry(args.data_folder, mmap_bundle=False))
+    data_manager = graph_builder.registry.get(args.dataset)
+    ks = args.ks or sorted(int(k) for k in data_manager.data["clustering"].keys())
+
+    sizes, compressed = [], []
+    for k in ks:
+        for i in range(graph_builder.get_cluster_count(args.dataset, k)):
+            # Serialized the way Dash sends component props
+            graph = graph_builder.create_graph(i, graph_builder.get_graph_data(args.dataset, k, i)).to_plotly_json()
+            payload = json.dumps(graph, cls=plotly.utils.PlotlyJSONEncoder).encode()
+            sizes.append(len(payload))
+            compressed.append(len(gzip.compress(payload)))
+
+    stylesheet = json.dumps(graph_builder.get_stylesheet(args.dataset)).encode()
+    results = {
+        "dataset": args.dataset,
+        "graphs": len(sizes),
+        "mean_bytes_per_graph": statistics.mean(sizes),
+        "max_bytes_per_graph": max(sizes),
+        "mean_gzip_bytes_per_graph": statistics.mean(compressed),
+        "stylesheet_bytes": len(stylesheet),
+        "budget": args.budget,
+    }
+    results["within_budget"] = results["mean_bytes_per_graph"] <= args.budget
+    print(json.dumps(results, indent=2))
+    sys.exit(0 if results["within_budget"] else 1)
+
+
+if __name__ == "__main__":
+    main()
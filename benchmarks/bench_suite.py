@@ -0,0 +1,155 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from model.data_manager import DataManager
+from model.dataset_registry import DatasetRegistry
+from view.graph_builder import GraphBuilder
+from benchmarks.dash_client import DashClient, prop
+
+
+def measure(run, setup=None, repeat=5):
+    """
+    Time run(state) over repeat fresh states from setup(), then measure its peak traced memory once.
+    """
+    timings = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        run(state)
+        timings.append(time.perf_counter() - start)
+
+    # Traced separately, tracemalloc slows allocations down
+    state = setup() if setup else None
+    tracemalloc.start()
+    try:
+        run(state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"median_s": statistics.median(timings), "min_s": min(timings), "max_s": max(timings), "peak_bytes": peak}
+
+
+def loaded_data_manager(data_folder, dataset, use_bundle=False):
+    data_manager = DataManager(data_folder)
+    data_manager.load_dataset(dataset)
+    data_manager.load_files(use_bundle=use_bundle)
+    return data_manager
+
+
+def benchmark_model(data_folder, dataset, ks, repeat):
+    results = {}
+
+    def new_data_manager():
+        data_manager = DataManager(data_folder)
+        data_manager.load_dataset(dataset)
+        return data_manager
+
+    results["load_files_text"] = measure(lambda dm: dm.load_files(use_bundle=False), new_data_manager, repeat)
+    new_data_manager().compile_bundle()
+    results["load_files_bundle"] = measure(lambda dm: dm.load_files(), new_data_manager, repeat)
+
+    # Label rows are parsed on first use, so each run starts from a freshly loaded dataset
+    for k in ks:
+        results[f"get_clustering[k={k}]"] = measure(
+            lambda dm, k=k: dm.get_clustering(k), lambda: loaded_data_manager(data_folder, dataset), repeat)
+
+    registry = DatasetRegistry(data_folder, mmap_bundle=False)
+    registry.load(dataset)
+    for k in ks:
+        results[f"get_graphs[k={k}]"] = measure(
+            lambda builder, k=k: builder.get_graphs(dataset, k), lambda: GraphBuilder(registry), repeat)
+        warm_builder = GraphBuilder(registry)
+        warm_builder.get_graphs(dataset, k)
+        results[f"get_graphs_cached[k={k}]"] = measure(lambda _, k=k: warm_builder.get_graphs(dataset, k), None, repeat)
+    return results
+
+
+def benchmark_callbacks(data_folder, dataset, ks, repeat):
+    from controller.app_controller import AppController
+
+    controller = AppController(warmup_workers=0, data_folder=data_folder)
+    client = DashClient.for_test_client(controller.app.server.test_client())
+    results = {}
+
+    def timed(name, call):
+        timings, sizes, errors = [], [], 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            status, _, size = call()
+            timings.append(time.perf_counter() - start)
+            sizes.append(size)
+            errors += status != 200
+        results[name] = {"median_s": statistics.median(timings), "min_s": min(timings), "max_s": max(timings),
+                         "response_bytes": statistics.median(sizes), "errors": errors}
+
+    session = prop("session-store", "data", {"session_id": "bench", "dataset": None})
+    # The load runs as a background job in a separate process, timed until its result is polled
+    timed("load_dataset", lambda: client.call_background(
+        "..k-slider.max", [prop("load-dataset-button", "n_clicks", 1)],
+        [prop("dataset-selector", "value", dataset), session], ["load-dataset-button.n_clicks"]))
+
+    session = prop("session-store", "data", {"session_id": "bench", "dataset": dataset})
+    pruning = [prop("threshold-mode", "value", "percent"), prop("node-threshold", "value"),
+               prop("edge-threshold", "value"), prop("keep-connected", "value", True)]
+    for k in ks:
+        timed(f"reset_pagination[k={k}]", lambda k=k: client.call(
+            "..graph-pagination", [prop("k-slider", "value", k)], [session], ["k-slider.value"]))
+        timed(f"update_graphs[k={k}]", lambda k=k: client.call(
+            "graph-container.children@", [prop("k-slider", "value", k), prop("graph-pagination", "active_page", 1)] + pruning,
+            [session], ["k-slider.value"]))
+        buttons = [prop({"type": "fullscreen-btn", "index": i}, "n_clicks", 1 if i == 0 else None)
+                   for i in range(min(controller.graph_builder.page_size, controller.graph_builder.get_cluster_count(dataset, k)))]
+        timed(f"fullscreen_modal[k={k}]", lambda k=k, buttons=buttons: client.call(
+            "..fullscreen-modal", [buttons], [prop("k-slider", "value", k)] + pruning + [session],
+            ['{"index":0,"type":"fullscreen-btn"}.n_clicks']))
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def main():
+    """
+    Time and measure peak memory of loading, clustering, graph building and callbacks, as JSON.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("datasets", nargs="+")
+    parser.add_argument("--data-folder", default="data/")
+    parser.add_argument("--ks", type=int, nargs="*", default=None, help="k values to measure, min, best and max k by default")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-callbacks", action="store_true", help="Only run the model and view benchmarks")
+    parser.add_argument("--output", default=None, help="Write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    results = {"commit": git_commit(), "python": platform.python_version(), "repeat": args.repeat, "datasets": {}}
+    for dataset in args.datasets:
+        data_manager = loaded_data_manager(args.data_folder, dataset)
+        ks = args.ks or sorted({data_manager.get_min_k(), data_manager.get_best_k(), data_manager.get_max_k()} - {None})
+        results["datasets"][dataset] = {"ks": ks, "benchmarks": benchmark_model(args.data_folder, dataset, ks, args.repeat)}
+        if not args.skip_callbacks:
+            results["datasets"][dataset]["callbacks"] = benchmark_callbacks(args.data_folder, dataset, ks, args.repeat)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import gzip
+import json
+import time
+import http.client
+import urllib.parse
+
+
+def prop(component_id, name, value=None):
+    return {"id": component_id, "property": name, "value": value}
+
+
+class DashClient:
+    """
+    Minimal Dash renderer stand-in: posts callback requests the way the browser does.
+
+    request(method, path, body) sends one HTTP request and returns (status, bytes),
+    so the same client drives a Flask test client or a real server.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        status, data = self.request("GET", "/_dash-dependencies", None)
+        self.dependencies = json.loads(data)
+
+    @classmethod
+    def for_test_client(cls, client):
+        def request(method, path, body):
+            response = client.open(path, method=method, json=body)
+            return response.status_code, response.data
+        return cls(request)
+
+    @classmethod
+    def for_url(cls, base_url, timeout=600):
+        # One keep-alive connection per client, responses are gzip encoded like for a browser
+        parts = urllib.parse.urlsplit(base_url)
+        connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+
+        def request(method, path, body):
+            headers = {"Accept-Encoding": "gzip"}
+            payload = None
+            if body is not None:
+                payload = json.dumps(body).encode()
+                headers["Content-Type"] = "application/json"
+            try:
+                connection.request(method, path, payload, headers)
+                response = connection.getresponse()
+            except (http.client.HTTPException, OSError):
+                # Reconnect once if the server closed the keep-alive connection
+                connection.close()
+                connection.request(method, path, payload, headers)
+                response = connection.getresponse()
+            data = response.read()
+            if response.getheader("Content-Encoding") == "gzip":
+                data = gzip.decompress(data)
+            return response.status, data
+        return cls(request)
+
+    @staticmethod
+    def parse_outputs(output):
+        # "..a.x...b.y.." for multi-output callbacks, "a.x" otherwise; ids of pattern outputs are JSON
+        multi = output.startswith("..")
+        outputs = []
+        for part in (output[2:-2].split("...") if multi else [output]):
+            component_id, name = part.rsplit(".", 1)
+            component_id = json.loads(component_id) if component_id.startswith("{") else component_id
+            outputs.append({"id": component_id, "property": name.split("@")[0]})
+        return outputs if multi else outputs[0]
+
+    def find(self, output):
+        # Callbacks are looked up by a prefix of their output string, e.g. "..k-slider.max"
+        return next(dependency for dependency in self.dependencies if dependency["output"].startswith(output))
+
+    def body(self, output, inputs, state=(), changed=()):
+        dependency = self.find(output)
+        return {
+            "output": dependency["output"],
+            "outputs": self.parse_outputs(dependency["output"]),
+            "inputs": list(inputs),
+            "state": list(state),
+            "changedPropIds": list(changed),
+        }
+
+    def call(self, output, inputs, state=(), changed=(), path="/_dash-update-component"):
+        """
+        Post one callback request.
+
+        Returns:
+            tuple: HTTP status, decoded JSON response (None when empty) and response size in bytes.
+        """
+        status, data = self.request("POST", path, self.body(output, inputs, state, changed))
+        return status, (json.loads(data) if data else None), len(data)
+
+    def call_background(self, output, inputs, state=(), changed=(), interval=0.1, timeout=600):
+        # Background callbacks answer with signed job handles, then the result is polled with them
+        status, response, size = self.call(output, inputs, state, changed)
+        if status != 200 or not response or "cacheKey" not in response:
+            return status, response, size
+        query = urllib.parse.urlencode({"cacheKey": response["cacheKey"], "job": response["job"]})
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            status, response, polled = self.call(output, inputs, state, changed, "/_dash-update-component?" + query)
+            size += polled
+            if status != 200 or (response and "response" in response):
+                return status, response, size
+            time.sleep(interval)
+        return 504, None, size
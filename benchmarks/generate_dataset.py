@@ -0,0 +1,118 @@
+import os
+import argparse
+
+import numpy as np
+import pandas as pd
+
+VERBS = ["Create", "Send", "Check", "Approve", "Reject", "Update", "Notify", "Close", "Review", "Register",
+         "Cancel", "Archive", "Assign", "Escalate", "Validate", "Schedule"]
+OBJECTS = ["Order", "Invoice", "Payment", "Claim", "Request", "Ticket", "Report", "Account", "Shipment", "Contract",
+           "Appeal", "Penalty"]
+
+
+def event_type_names(count):
+    names = [f"{verb} {obj}" for obj in OBJECTS for verb in VERBS]
+    return [names[i % len(names)] + ("" if i < len(names) else f" {i // len(names) + 1}") for i in range(count)]
+
+
+def generate_sequences(rng, variants, event_types, min_length, max_length):
+    # Sequences follow a sparse random process model, so clusters and DFGs look like those of real logs
+    transitions = rng.random((event_types, event_types)) ** 4
+    transitions /= transitions.sum(axis=1, keepdims=True)
+    cumulative = transitions.cumsum(axis=1)
+    starts = rng.dirichlet(np.full(event_types, 0.3))
+
+    sequences = {}
+    attempts = 0
+    while len(sequences) < variants and attempts < 50:
+        batch = (variants - len(sequences)) * 2
+        lengths = rng.integers(min_length, max_length + 1, batch)
+        steps = np.empty((batch, max_length), dtype=np.int64)
+        steps[:, 0] = rng.choice(event_types, batch, p=starts)
+        for t in range(1, max_length):
+            draws = rng.random(batch)
+            steps[:, t] = np.minimum((cumulative[steps[:, t - 1]] < draws[:, None]).sum(axis=1), event_types - 1)
+        for row, length in zip(steps, lengths):
+            sequences.setdefault(tuple(row[:length] + 1), None)
+            if len(sequences) == variants:
+                break
+        attempts += 1
+    return list(sequences)
+
+
+def write_clustering(path, rng, n, min_k, max_k):
+    # Nested random splits: every k refines k - 1, like cuts of a dendrogram
+    order = rng.permutation(n) + 1
+    boundaries = [0, n]
+    with open(path, "w") as f:
+        for k in range(1, max_k + 1):
+            if k > 1:
+                # Split the largest cluster at a random point
+                sizes = np.diff(boundaries)
+                largest = int(np.argmax(sizes))
+                low, high = boundaries[largest], boundaries[largest + 1]
+                boundaries.insert(largest + 1, int(rng.integers(low + 1, high)))
+            if k < min_k:
+                continue
+            f.write(f"k:{k}\n")
+            for cluster_id, (low, high) in enumerate(zip(boundaries[:-1], boundaries[1:]), start=1):
+                f.write(f"cluster;{cluster_id};node:{','.join(map(str, np.sort(order[low:high]).tolist()))}\n")
+
+
+def write_good_k(path, rng, min_k, max_k, count):
+    candidates = np.arange(max(min_k, 2), max_k + 1)
+    good_k = sorted(rng.choice(candidates, min(count, len(candidates)), replace=False).tolist()) if len(candidates) else [min_k]
+    best_k = int(rng.choice(good_k))
+    with open(path, "w") as f:
+        f.write(f"numClusters:{max_k}\n")
+        f.write(f"bestK:{best_k}\n")
+        f.write(f"goodKValues:{','.join(map(str, [best_k] + good_k))}\n")
+
+
+def generate(data_folder, name, variants, event_types, min_length, max_length, min_k, max_k, good_k, seed):
+    rng = np.random.default_rng(seed)
+    root = os.path.join(data_folder, name)
+    os.makedirs(root, exist_ok=True)
+
+    pd.DataFrame({"id_eventType": np.arange(1, event_types + 1), "type": event_type_names(event_types)}).to_csv(
+        os.path.join(root, f"event_types_{name}.csv"), index=False)
+
+    sequences = generate_sequences(rng, variants, event_types, min_length, max_length)
+    n = len(sequences)
+    # Zipf-like frequencies, the first variants are the most common ones
+    frequencies = np.maximum(1, (10000 / np.arange(1, n + 1) ** 1.1).astype(np.int64))
+    pd.DataFrame({
+        "id_uniqueSeq": np.arange(1, n + 1),
+        "frequency": frequencies,
+        "sequence": ["-".join(map(str, sequence)) for sequence in sequences],
+    }).to_csv(os.path.join(root, f"unique_sequences_{name}.csv"), index=False)
+
+    max_k = min(max_k or n - 1, n)
+    write_clustering(os.path.join(root, f"clustering_{name}.txt"), rng, n, min_k, max_k)
+    write_good_k(os.path.join(root, f"good_k_{name}.txt"), rng, min_k, max_k, good_k)
+    print(f"Generated {name} with {n} variants of {event_types} event types and k = {min_k}..{max_k} in {root}")
+    return root
+
+
+def main():
+    """
+    Write a synthetic data/<name>/ folder in the four-file dataset format.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("name", help="Dataset folder name, e.g. Synthetic10k")
+    parser.add_argument("--data-folder", default="data/")
+    parser.add_argument("--variants", type=int, default=10000, help="Number of unique sequences")
+    parser.add_argument("--event-types", type=int, default=30)
+    parser.add_argument("--min-length", type=int, default=3)
+    parser.add_argument("--max-length", type=int, default=25)
+    parser.add_argument("--min-k", type=int, default=1)
+    parser.add_argument("--max-k", type=int, default=300, help="Largest k written, 0 for one less than the variants")
+    parser.add_argument("--good-k", type=int, default=20, help="Number of good k values")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate(args.data_folder, args.name, args.variants, args.event_types, args.min_length, args.max_length,
+             args.min_k, args.max_k, args.good_k, args.seed)
+
+
+if __name__ == "__main__":
+    main()
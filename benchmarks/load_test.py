@@ -0,0 +1,209 @@
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.dash_client import DashClient, prop
+
+
+class Recorder:
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def record(self, name, seconds, ok):
+        with self.lock:
+            self.latencies[name].append(seconds)
+            if not ok:
+                self.errors[name] += 1
+
+    def report(self, elapsed):
+        report = {}
+        for name, latencies in sorted(self.latencies.items()):
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            report[name] = {
+                "requests": len(latencies),
+                "throughput_rps": len(latencies) / elapsed,
+                "p50_ms": p50 * 1000,
+                "p95_ms": p95 * 1000,
+                "p99_ms": p99 * 1000,
+                "error_rate": self.errors[name] / len(latencies),
+            }
+        return report
+
+
+class Session:
+    """
+    One simulated analyst: loads a dataset, then moves the k-slider across its good k values,
+    flips pages and opens clusters in fullscreen, polling the warm-up progress like the browser.
+
+    Hovering a graph is handled by clientside callbacks and sends no request, so hover bursts
+    only add think time here.
+    """
+
+    def __init__(self, base_url, dataset, recorder, think_time, rng):
+        self.client = DashClient.for_url(base_url)
+        self.dataset = dataset
+        self.recorder = recorder
+        self.think_time = think_time
+        self.rng = rng
+        self.session = {"session_id": uuid.uuid4().hex, "dataset": None, "version": None}
+        self.good_k = []
+        self.pruning = [prop("threshold-mode", "value", "percent"), prop("node-threshold", "value"),
+                        prop("edge-threshold", "value"), prop("keep-connected", "value", True)]
+
+    def timed(self, name, call):
+        start = time.perf_counter()
+        try:
+            status, response, _ = call()
+            ok = status == 200
+        except Exception:
+            status, response, ok = None, None, False
+        self.recorder.record(name, time.perf_counter() - start, ok)
+        return response if ok else None
+
+    def pause(self):
+        if self.think_time:
+            time.sleep(self.rng.expovariate(1 / self.think_time))
+
+    def session_state(self):
+        return prop("session-store", "data", self.session)
+
+    def load(self):
+        response = self.timed("load_dataset", lambda: self.client.call_background(
+            "..k-slider.max", [prop("load-dataset-button", "n_clicks", 1)],
+            [prop("dataset-selector", "value", self.dataset), self.session_state()], ["load-dataset-button.n_clicks"]))
+        if response is None:
+            return False
+        result = response["response"]
+        self.session = result["session-store"]["data"]
+        marks = [int(k) for k in result["k-slider"]["marks"]]
+        self.good_k = sorted(marks) or [result["k-slider"]["value"]]
+        # The browser attaches the session and starts the warm-up poll once the load finishes
+        self.timed("warmup_progress", lambda: self.client.call(
+            "..warmup-progress", [prop("warmup-interval", "n_intervals", 0), self.session_state()], [], ["session-store.data"]))
+        return True
+
+    def move_slider(self, k):
+        response = self.timed("reset_pagination", lambda: self.client.call(
+            "..graph-pagination", [prop("k-slider", "value", k)], [self.session_state()], ["k-slider.value"]))
+        pages = response["response"]["graph-pagination"]["max_value"] if response else 1
+        return pages, self.change_page(k, 1, "k-slider.value")
+
+    def change_page(self, k, page, changed="graph-pagination.active_page"):
+        response = self.timed("update_graphs", lambda: self.client.call(
+            "graph-container.children@", [prop("k-slider", "value", k), prop("graph-pagination", "active_page", page)] + self.pruning,
+            [self.session_state()], [changed]))
+        # Each cluster is a title row and a graph row
+        return len(response["response"]["graph-container"]["children"]) // 2 if response else 0
+
+    def open_fullscreen(self, k, index, visible):
+        buttons = [prop({"type": "fullscreen-btn", "index": i}, "n_clicks", 1 if i == index else None) for i in visible]
+        self.timed("fullscreen_modal", lambda: self.client.call(
+            "..fullscreen-modal", [buttons], [prop("k-slider", "value", k)] + self.pruning + [self.session_state()],
+            [json.dumps({"index": index, "type": "fullscreen-btn"}, separators=(",", ":")) + ".n_clicks"]))
+
+    def poll_warmup(self):
+        self.timed("warmup_progress", lambda: self.client.call(
+            "..warmup-progress", [prop("warmup-interval", "n_intervals", 1), self.session_state()], [], ["warmup-interval.n_intervals"]))
+
+    def run(self, actions, page_size):
+        if not self.load():
+            return
+        for _ in range(actions):
+            self.pause()
+            k = self.rng.choice(self.good_k)
+            pages, shown = self.move_slider(k)
+            self.poll_warmup()
+            page = 1
+            if pages > 1 and self.rng.random() < 0.3:
+                page = self.rng.randint(2, pages)
+                self.pause()
+                shown = self.change_page(k, page)
+            if shown and self.rng.random() < 0.3:
+                self.pause()
+                visible = list(range((page - 1) * page_size, (page - 1) * page_size + shown))
+                self.open_fullscreen(k, self.rng.choice(visible), visible)
+
+
+def start_local_server(data_folder, port):
+    from werkzeug.serving import make_server
+    from controller.app_controller import AppController
+
+    controller = AppController(data_folder=data_folder)
+    server = make_server("127.0.0.1", port, controller.app.server, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def main():
+    """
+    Replay concurrent analyst sessions against the Dash callbacks and report latency percentiles per callback.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("dataset", nargs="?", default="RoadTraffic")
+    parser.add_argument("--url", default=None, help="Target a running server instead of starting a local one")
+    parser.add_argument("--data-folder", default="data/")
+    parser.add_argument("--port", type=int, default=0, help="Port of the local server, any free port by default")
+    parser.add_argument("--sessions", type=int, default=50, help="Concurrent simulated sessions")
+    parser.add_argument("--actions", type=int, default=20, help="Slider moves per session after its load")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Mean pause between actions, in seconds")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="Seconds over which sessions are started")
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server, url = start_local_server(args.data_folder, args.port)
+
+    recorder = Recorder()
+    threads = []
+    start = time.perf_counter()
+    for i in range(args.sessions):
+        session = Session(url, args.dataset, recorder, args.think_time, random.Random(args.seed + i))
+        thread = threading.Thread(target=session.run, args=(args.actions, args.page_size), daemon=True)
+        thread.start()
+        threads.append(thread)
+        time.sleep(args.ramp_up / max(args.sessions, 1))
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    if server is not None:
+        server.shutdown()
+
+    results = {
+        "url": url,
+        "dataset": args.dataset,
+        "sessions": args.sessions,
+        "actions": args.actions,
+        "elapsed_s": elapsed,
+        "requests": sum(len(latencies) for latencies in recorder.latencies.values()),
+        "callbacks": recorder.report(elapsed),
+    }
+    results["throughput_rps"] = results["requests"] / elapsed
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import argparse
+
+from model.data_manager import DataManager
+from model.event_log_ingestor import EventLogIngestor
+from model.sequence_clusterer import SequenceClusterer
+from model.dataset_registry import DatasetRegistry
+from view.graph_exporter import GraphExporter, FORMATS
+
+
+def compile_datasets(args):
+    """
+    Compile data/<dataset>/ folders into binary bundles for fast startup.
+    """
+    data_manager = DataManager(args.data_folder)
+    names = list(data_manager.datasets) if args.all else args.datasets
+    for name in names:
+        data_manager = DataManager(args.data_folder)
+        data_manager.load_dataset(name)
+        data_manager.compile_bundle()
+
+
+def ingest_log(args):
+    """
+    Build the event types and unique sequences files of a dataset from a raw event log.
+    """
+    ingestor = EventLogIngestor(args.case_column, args.activity_column, args.timestamp_column,
+                                args.timestamp_format, args.chunk_size)
+    ingestor.ingest(args.log, args.data_folder, args.dataset)
+
+
+def cluster_datasets(args):
+    """
+    Cluster the unique sequences of datasets and write their clustering and good k files.
+    """
+    clusterer = SequenceClusterer(args.method, args.workers, args.chunk_size, args.max_good_k)
+    for name in args.datasets:
+        data_manager = DataManager(args.data_folder)
+        data_manager.load_dataset(name)
+        clusterer.run(data_manager, args.max_k)
+
+
+def export_graphs(args):
+    """
+    Write the cluster DFGs of datasets as Cytoscape JSON, Graphviz DOT and CSV edge list files.
+    """
+    exporter = GraphExporter(DatasetRegistry(args.data_folder), args.output, args.formats, args.workers, args.chunk_size)
+    for name in args.datasets:
+        exporter.export(name, args.ks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DFG dataset tools")
+    parser.add_argument("--data-folder", default="data/", help="Folder holding one sub-folder per dataset")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    compile_parser = subparsers.add_parser("compile", help="Compile datasets into binary bundles")
+    compile_parser.add_argument("datasets", nargs="*", help="Names of the datasets to compile")
+    compile_parser.add_argument("--all", action="store_true", help="Compile every dataset in the data folder")
+    compile_parser.set_defaults(handler=compile_datasets)
+
+    ingest_parser = subparsers.add_parser("ingest", help="Build a dataset from a raw event log")
+    ingest_parser.add_argument("log", help="CSV event log with one row per event")
+    ingest_parser.add_argument("dataset", help="Name of the dataset folder to write")
+    ingest_parser.add_argument("--case-column", default="case_id")
+    ingest_parser.add_argument("--activity-column", default="activity")
+    ingest_parser.add_argument("--timestamp-column", default="timestamp")
+    ingest_parser.add_argument("--timestamp-format", default=None, help="strftime format of the timestamps, inferred if omitted")
+    ingest_parser.add_argument("--chunk-size", type=int, default=1_000_000, help="Events read per chunk")
+    ingest_parser.set_defaults(handler=ingest_log)
+
+    cluster_parser = subparsers.add_parser("cluster", help="Cluster unique sequences into the clustering and good k files")
+    cluster_parser.add_argument("datasets", nargs="+", help="Names of the datasets to cluster")
+    cluster_parser.add_argument("--max-k", type=int, default=None, help="Largest number of clusters, all but one sequence by default")
+    cluster_parser.add_argument("--max-good-k", type=int, default=None, help="Largest k considered as good, twice the square root of the number of sequences by default")
+    cluster_parser.add_argument("--method", default="average", help="Linkage method (average, complete, single, weighted)")
+    cluster_parser.add_argument("--workers", type=int, default=None, help="Distance worker processes, one per CPU by default")
+    cluster_parser.add_argument("--chunk-size", type=int, default=256, help="Sequences per distance chunk")
+    cluster_parser.set_defaults(handler=cluster_datasets)
+
+    export_parser = subparsers.add_parser("export", help="Export the cluster DFGs of every k to files")
+    export_parser.add_argument("datasets", nargs="+", help="Names of the datasets to export")
+    export_parser.add_argument("--output", default="export/", help="Folder receiving one sub-folder per dataset")
+    export_parser.add_argument("--ks", type=int, nargs="*", default=None, help="k values to export, all of them by default")
+    export_parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    export_parser.add_argument("--workers", type=int, default=None, help="Export worker processes, one per CPU by default")
+    export_parser.add_argument("--chunk-size", type=int, default=100, help="Clusters written per file write")
+    export_parser.set_defaults(handler=export_graphs)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import hashlib
+
+import numpy as np
+from flask import Response, jsonify, request, abort
+
+
+class ApiManager:
+    """
+    Read-only JSON routes over the loaded datasets, served by the Flask server of the Dash app.
+
+    Every response carries a strong ETag derived from the dataset version (and k, and
+    cluster rank), so clients polling with If-None-Match get an empty 304 without
+    anything being recomputed. The version is the signature of the source files,
+    checked on every request, and a dataset is reloaded when they change. Bodies
+    are gzip compressed with the rest of the app.
+
+        GET /api/v1/datasets
+        GET /api/v1/datasets/<dataset>
+        GET /api/v1/datasets/<dataset>/k/<k>
+        GET /api/v1/datasets/<dataset>/k/<k>/clusters/<rank>
+    """
+
+    prefix = "/api/v1"
+
+    def __init__(self, app, registry, graph_builder):
+        self.app = app
+        self.registry = registry
+        self.graph_builder = graph_builder
+
+    @staticmethod
+    def not_modified(etag):
+        # The tag is checked before any work, an unchanged resource costs a lookup and an empty response.
+        # Compression tags gzip bodies as "<etag>:gzip", clients holding either representation are answered
+        for tag in (etag, f"{etag}:gzip"):
+            if request.if_none_match.contains(tag):
+                response = Response(status=304)
+                response.set_etag(tag)
+                response.headers["Cache-Control"] = "no-cache"
+                return response
+        return None
+
+    @staticmethod
+    def not_found(description):
+        response = jsonify({"error": description})
+        response.status_code = 404
+        abort(response)
+
+    @staticmethod
+    def json_response(body, etag):
+        response = jsonify(body)
+        response.set_etag(etag)
+        # Clients may keep the body but must revalidate it, which is what makes the 304s possible
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    def get_data_manager(self, dataset):
+        if dataset not in {option["value"] for option in self.registry.get_available_datasets()}:
+            self.not_found(f"Unknown dataset {dataset}")
+        data_manager = self.registry.get_current(dataset)
+        if not data_manager.data.get("clustering"):
+            self.not_found(f"Dataset {dataset} has no clustering")
+        return data_manager
+
+    def check_k(self, data_manager, k):
+        if k not in data_manager.data["clustering"]:
+            self.not_found(f"Dataset {data_manager.dataset} has no clustering for k = {k}")
+
+    def register_routes(self):
+        server = self.app.server
+
+        @server.route(f"{self.prefix}/datasets")
+        def api_datasets():
+            names = [option["value"] for option in self.registry.get_available_datasets()]
+            loaded = {name: self.registry.get_current(name).get_version() for name in names if name in self.registry.datasets}
+            etag = hashlib.sha1(repr(sorted(loaded.items()) + names).encode()).hexdigest()[:16]
+            response = self.not_modified(etag)
+            if response is not None:
+                return response
+            return self.json_response(
+                {"datasets": [{"name": name, "loaded": name in loaded, "version": loaded.get(name)} for name in names]},
+                etag)
+
+        @server.route(f"{self.prefix}/datasets/<dataset>")
+        def api_dataset(dataset):
+            data_manager = self.get_data_manager(dataset)
+            etag = data_manager.get_version()
+            response = self.not_modified(etag)
+            if response is not None:
+                return response
+            return self.json_response({
+                "name": dataset,
+                "version": etag,
+                "min_k": data_manager.get_min_k(),
+                "max_k": data_manager.get_max_k(),
+                "best_k": int(data_manager.get_best_k()) if data_manager.get_best_k() else None,
+                "good_k": [int(k) for k in data_manager.get_good_k() or []],
+                "ks": sorted(data_manager.data["clustering"].keys()),
+            }, etag)
+
+        @server.route(f"{self.prefix}/datasets/<dataset>/k/<int:k>")
+        def api_cluster_order(dataset, k):
+            data_manager = self.get_data_manager(dataset)
+            self.check_k(data_manager, k)
+            etag = f"{data_manager.get_version()}-k{k}"
+            response = self.not_modified(etag)
+            if response is not None:
+                return response
+            # Clusters in the rank order of the UI, rank 1 is the most frequent
+            clustering = data_manager.data["clustering"]
+            sizes = clustering.cluster_sizes(k)
+            frequencies = clustering.cluster_frequencies(k)
+            clusters = [
+                {"rank": rank, "cluster_id": cluster_id, "frequency": int(frequencies[cluster_id]),
+                 "sequences": int(sizes[cluster_id])}
+                for rank, cluster_id in enumerate(self.graph_builder.get_cluster_order(dataset, k), start=1)
+            ]
+            return self.json_response({"name": dataset, "version": data_manager.get_version(), "k": k,
+                                       "clusters": clusters}, etag)
+
+        @server.route(f"{self.prefix}/datasets/<dataset>/k/<int:k>/clusters/<int:rank>")
+        def api_cluster_dfg(dataset, k, rank):
+            data_manager = self.get_data_manager(dataset)
+            self.check_k(data_manager, k)
+            etag = f"{data_manager.get_version()}-k{k}-c{rank}"
+            response = self.not_modified(etag)
+            if response is not None:
+                return response
+            # Ranks run over the non-empty clusters of k
+            if not 1 <= rank <= np.count_nonzero(data_manager.data["clustering"].cluster_sizes(k)):
+                self.not_found(f"k = {k} of dataset {dataset} has no cluster {rank}")
+            order = self.graph_builder.get_cluster_order(dataset, k)
+            # Same cached graph data as the cluster graphs of the UI
+            graph_data = self.graph_builder.get_graph_data(dataset, k, rank - 1)
+            nodes, edges = [], []
+            for element in graph_data["elements"]:
+                data = element["data"]
+                if "source" in data:
+                    edges.append({"source": data["source"], "target": data["target"], "frequency": data["weight"]})
+                else:
+                    nodes.append({"event": data["id"], "frequency": data["frequency"]})
+            return self.json_response({"name": dataset, "version": data_manager.get_version(), "k": k, "rank": rank,
+                                       "cluster_id": order[rank - 1], "nodes": nodes, "edges": edges}, etag)
@@ -1,22 +1,55 @@
-from dash import Dash
+import diskcache
+from dash import Dash, DiskcacheManager
 import dash_bootstrap_components as dbc
 
-from model.data_manager import DataManager
+from model.dataset_registry import DatasetRegistry
 from view.graph_builder import GraphBuilder
+from view.graph_warmup import GraphWarmup
 from view.layout_manager import LayoutManager
 from controller.callbacks_manager import CallbacksManager
+from controller.api_manager import ApiManager
+from utils import metrics
 
 
 
 class AppController:
 
-    def __init__(self):
-        self.app = Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
-        self.data_manager = DataManager()
-        self.layout_manager = LayoutManager(self.data_manager)
-        self.graph_builder = GraphBuilder(self.data_manager)
-        self.callbacks = CallbacksManager(self.app, self.data_manager, self.graph_builder)
+    def __init__(self, warmup_workers=1, callback_cache_dir=".cache/callbacks", data_folder="data/",
+                 bundle_cache_dir=".cache/bundles", debug=False):
+        # Long running callbacks (dataset loads) run in worker processes, their results go through a local disk cache
+        self.background_callback_manager = DiskcacheManager(diskcache.Cache(callback_cache_dir))
+        # Responses are gzip compressed, graph elements compress well
+        self.app = Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP], compress=True,
+                        background_callback_manager=self.background_callback_manager)
+        # Loaded datasets are shared by all sessions; each session picks one through its session store
+        # Clustering indexes (and any bundle saved by the app) go to the cache folder, the data folder is never written
+        self.registry = DatasetRegistry(data_folder, bundle_folder=bundle_cache_dir)
+        self.registry.validate_bundles()
+        self.layout_manager = LayoutManager(self.registry)
+        self.graph_builder = GraphBuilder(self.registry)
+        # Optional background pre-computation of every k after a dataset loads
+        self.warmup = GraphWarmup(self.graph_builder, warmup_workers) if warmup_workers else None
+        self.callbacks = CallbacksManager(self.app, self.registry, self.graph_builder, self.warmup)
         self.callbacks.register_callbacks()
+        # Read-only JSON API for other tools, on the same server and caches as the UI
+        self.api = ApiManager(self.app, self.registry, self.graph_builder)
+        self.api.register_routes()
 
-        self.app.layout = self.layout_manager.get_layout()
+        # Serve the layout through a function so every page load gets its own session id
+        self.app.layout = self.layout_manager.get_layout
+
+        # Opt-in timings and /metrics route, enabled with DFG_METRICS=1; the profiler only in debug or with DFG_PROFILE=1
+        if metrics.ENABLED:
+            metrics.install(self.app, [self.get_cache_metrics], profile_route=debug or metrics.PROFILE)
+
+    def get_cache_metrics(self):
+        stats = self.graph_builder.get_cache_stats()
+        return {
+            "dfg_graph_cache_entries": stats["entries"],
+            "dfg_graph_cache_bytes": stats["bytes"],
+            "dfg_graph_cache_hits_total": stats["hits"],
+            "dfg_graph_cache_misses_total": stats["misses"],
+            "dfg_graph_cache_evictions_total": stats["evictions"],
+            "dfg_graph_cache_hit_ratio": stats["hit_rate"],
+        }
 
@@ -1,16 +1,110 @@
-from dash import Dash, html, dcc, Input, Output, State, ALL, callback_context, no_update
+from dash import Dash, html, dcc, Input, Output, State, ALL, MATCH, callback_context, no_update
 from dash.exceptions import PreventUpdate
 import dash_cytoscape as cyto
 import json
 import dash_bootstrap_components as dbc
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Show the hovered node or edge of the triggering graph and start the auto-hide interval
+DISPLAY_TOOLTIP = """
+function(nodeDataList, edgeDataList) {
+    const ctx = window.dash_clientside.callback_context;
+    if (!ctx.triggered || ctx.triggered.length === 0) {
+        return ["", true];
+    }
+    const trigger = ctx.triggered[0];
+    const data = trigger.value;
+    if (data && trigger.prop_id.endsWith(".mouseoverNodeData")) {
+        return [`${data.id}, Frequency: ${data.frequency}`, false];
+    }
+    if (data && trigger.prop_id.endsWith(".mouseoverEdgeData")) {
+        return [`${data.source} → ${data.target}, Weight: ${data.weight}`, false];
+    }
+    return ["", true];
+}
+"""
+
+# Hide the tooltip and disable the interval
+HIDE_TOOLTIP = """
+function(nIntervals) {
+    return ["", true];
+}
+"""
+
+# Give every new graph the dataset stylesheet kept in the browser
+APPLY_STYLESHEET = """
+function(id, stylesheet) {
+    return stylesheet || window.dash_clientside.no_update;
+}
+"""
+
+
+# Progress bar value and label reported when each loading stage starts
+LOAD_STAGES = {
+    "bundle": (20, "Bundle"),
+    "event_types": (5, "Event types"),
+    "unique_sequences": (15, "Sequences"),
+    "clustering": (50, "Clustering"),
+    "good_k": (70, "Good k"),
+    "graphs": (80, "Graphs"),
+}
+
+LOAD_PROGRESS_SHOWN = {"display": "flex", "height": "16px", "marginTop": "5px", "marginLeft": "-50px"}
+LOAD_PROGRESS_HIDDEN = dict(LOAD_PROGRESS_SHOWN, display="none")
 
 
 class CallbacksManager:
 
-    def __init__(self, app, data_manager, graph_builder):
+    def __init__(self, app, registry, graph_builder, warmup=None):
         self.app = app
-        self.data_manager = data_manager
+        self.registry = registry
         self.graph_builder = graph_builder
+        self.warmup = warmup
+        # Datasets loaded by a background job are attached to this process off the request threads
+        self.attach_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dataset-attach")
+        self.attaching = {}
+
+    def get_session_dataset(self, session):
+        # Each browser session carries the dataset and version it loaded in its own session store
+        dataset_name = (session or {}).get("dataset")
+        if dataset_name and session.get("version"):
+            # The load may have run in another server process, which leaves this one holding an older version
+            self.registry.get(dataset_name, session["version"])
+        return dataset_name
+
+    @staticmethod
+    def get_threshold(mode, value):
+        # The inputs do not enforce their minimum, only a positive number prunes anything
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 < value < float("inf"):
+            return None
+        return mode, value
+
+    @classmethod
+    def get_pruning(cls, mode, node_value, edge_value, keep_connected):
+        # Thresholds of the pruning controls as a hashable tuple for GraphBuilder, None when nothing is pruned
+        node_threshold = cls.get_threshold(mode, node_value)
+        edge_threshold = cls.get_threshold(mode, edge_value)
+        if node_threshold is None and edge_threshold is None:
+            return None
+        return node_threshold, edge_threshold, bool(keep_connected)
+
+    def attach_dataset(self, dataset_name):
+        def attach():
+            try:
+                data_manager = self.registry.load(dataset_name)
+                # Drop graphs built from previous versions of this dataset
+                self.graph_builder.invalidate_cache(dataset_name, keep_version=data_manager.get_version())
+                # Precompute the other k values in the background
+                if self.warmup is not None:
+                    self.warmup.start(dataset_name)
+            except Exception as e:
+                print(f"Failed to attach {dataset_name}: {e}")
+
+        future = self.attaching.get(dataset_name)
+        if future is None or future.done():
+            future = self.attaching[dataset_name] = self.attach_executor.submit(attach)
+        return future
 
     def register_callbacks(self):
 
@@ -20,20 +114,38 @@ class CallbacksManager:
             Output("k-slider", "min"),
             Output('k-slider', 'marks'),
             Output('graph-container', 'children'),
+            Output("session-store", "data"),
+            Output("graph-stylesheet", "data"),
             Input("load-dataset-button", "n_clicks"),
             State("dataset-selector", "value"),
+            State("session-store", "data"),
+            # Runs in a separate process so request threads keep serving the other sessions
+            background=True,
+            running=[
+                (Output("load-dataset-button", "disabled"), True, False),
+                (Output("load-progress", "style"), LOAD_PROGRESS_SHOWN, LOAD_PROGRESS_HIDDEN),
+            ],
+            progress=[Output("load-progress", "value"), Output("load-progress", "label")],
         )
-        def load_dataset(n_clicks, dataset_name):
-            if n_clicks > 0:
-                # Load data
-                self.data_manager.load_dataset(dataset_name)
-                self.data_manager.load_files()
+        def load_dataset(set_progress, n_clicks, dataset_name, session):
+            if n_clicks > 0 and dataset_name:
+                def report(stage):
+                    set_progress(LOAD_STAGES[stage])
+
+                # This job runs in a forked process, where locks held by other server threads at fork time are
+                # never released, so it works on its own registry and graph builder instead of the shared ones
+                registry = self.registry.clone()
+                graph_builder = self.graph_builder.clone(registry)
+
+                # Index the dataset in this worker process. No bundle is compiled here, that would parse every k;
+                # the server processes attach lazily through the clustering index left in the bundle cache folder
+                data_manager = registry.load(dataset_name, progress=report)
 
                 # Update slider
-                max_k = self.data_manager.get_max_k()
-                min_k = self.data_manager.get_min_k()
-                k = self.data_manager.get_best_k()
-                good_k = self.data_manager.get_good_k()
+                max_k = data_manager.get_max_k()
+                min_k = data_manager.get_min_k()
+                k = data_manager.get_best_k()
+                good_k = data_manager.get_good_k()
                 # Create marks based on good_k
                 marks = {i: "" for i in good_k}
                 # Set marks labels for min and max k
@@ -41,39 +153,119 @@ class CallbacksManager:
                 marks[min_k] = str(min_k)
 
                 # Update graph container
-                graphs = self.graph_builder.get_graphs(k)
+                report("graphs")
+                graphs = graph_builder.get_graphs(dataset_name, k)
+
+                # Remember the loaded dataset for this session only
+                session = dict(session or {}, dataset=dataset_name, version=data_manager.get_version())
 
-                return max_k, k, min_k, marks, graphs
+                return max_k, k, min_k, marks, graphs, session, graph_builder.get_stylesheet(dataset_name)
             else:
                 raise PreventUpdate
 
+        @self.app.callback(
+            Output("warmup-progress", "value"),
+            Output("warmup-progress", "label"),
+            Output("warmup-interval", "disabled"),
+            Input("warmup-interval", "n_intervals"),
+            Input("session-store", "data"),
+            prevent_initial_call=True,
+        )
+        def update_warmup_progress(n_intervals, session):
+            # The session version is not checked here, the attach thread reloads the dataset off this request
+            dataset_name = (session or {}).get("dataset")
+            if not dataset_name:
+                return 0, "", True
+
+            if callback_context.triggered_id == "session-store":
+                # A load just finished in the background, attach its result to this server process
+                self.attach_dataset(dataset_name)
+
+            if self.warmup is None:
+                return 0, "", True
+
+            attaching = self.attaching.get(dataset_name)
+            if attaching is not None and not attaching.done():
+                # Keep polling until the dataset is attached and its warm-up started
+                return 0, "Attaching", False
+
+            progress = self.warmup.progress(dataset_name)
+            value = 100 * progress["done"] / progress["total"] if progress["total"] else 0
+            label = f"{progress['done']}/{progress['total']} k" if progress["total"] else ""
+            # Keep polling only while the warm-up is still running
+            return value, label, progress["state"] != "running"
+
+        @self.app.callback(
+            Output('graph-pagination', 'max_value'),
+            Output('graph-pagination', 'active_page'),
+            Input('k-slider', 'value'),
+            State("session-store", "data"),
+            prevent_initial_call=True,
+        )
+        def reset_pagination(k_value, session):
+            dataset_name = self.get_session_dataset(session)
+            if not dataset_name or k_value is None:
+                raise PreventUpdate
+
+            # A new k starts again from its most frequent clusters
+            return self.graph_builder.get_page_count(dataset_name, k_value), 1
+
         @self.app.callback(
             Output('graph-container', 'children', allow_duplicate=True),
             Input('k-slider', 'value'),
-            State("dataset-selector", "value"),
+            Input('graph-pagination', 'active_page'),
+            Input("threshold-mode", "value"),
+            Input("node-threshold", "value"),
+            Input("edge-threshold", "value"),
+            Input("keep-connected", "value"),
+            State("session-store", "data"),
             prevent_initial_call=True,
         )
-        def update_graphs(k_value, dataset_name):
+        def update_graphs(k_value, active_page, mode, node_value, edge_value, keep_connected, session):
+            dataset_name = self.get_session_dataset(session)
             if not dataset_name or k_value is None:
                 raise PreventUpdate
 
-            graphs = self.graph_builder.get_graphs(k_value)
+            pruning = self.get_pruning(mode, node_value, edge_value, keep_connected)
+            graphs = self.graph_builder.get_graphs(dataset_name, k_value, (active_page or 1) - 1, pruning)
 
             return graphs
 
+        @self.app.callback(
+            Output("search-results", "children"),
+            Input("pattern-search", "value"),
+            Input("k-slider", "value"),
+            State("session-store", "data"),
+            prevent_initial_call=True,
+        )
+        def update_search_results(pattern, k_value, session):
+            dataset_name = self.get_session_dataset(session)
+            if not dataset_name or k_value is None:
+                raise PreventUpdate
+            if not pattern:
+                return []
+
+            return self.graph_builder.get_search_results(dataset_name, k_value, pattern)
+
         @self.app.callback(
             [Output("fullscreen-modal", "is_open"),
              Output("modal-title", "children"),
              Output("modal-graph-container", "children")],
             [Input({"type": "fullscreen-btn", "index": ALL}, "n_clicks")],
-             State("graph-container", "children"),
+            [State("k-slider", "value"),
+             State("threshold-mode", "value"),
+             State("node-threshold", "value"),
+             State("edge-threshold", "value"),
+             State("keep-connected", "value"),
+             State("session-store", "data")],
             prevent_initial_call=True
         )
-        def handle_fullscreen_modal(fullscreen_clicks, graph_rows):
+        def handle_fullscreen_modal(fullscreen_clicks, k_value, mode, node_value, edge_value, keep_connected, session):
             ctx = callback_context
+            dataset_name = self.get_session_dataset(session)
             
             # Prevent execution if no trigger or if fullscreen_clicks is empty/None
-            if not ctx.triggered or not fullscreen_clicks:
+            if not ctx.triggered or not fullscreen_clicks or not dataset_name or k_value is None:
                 raise PreventUpdate
             
             # Check if any button was actually clicked (not just initial load)
@@ -92,149 +284,73 @@ class CallbacksManager:
                 try:
                     trigger_dict = json.loads(trigger_id_clean)
                     clicked_index = trigger_dict['index']
-                    
-                    if graph_rows and clicked_index is not None:
-                        # Calculate the graph row index (titles are at even indices, graphs at odd indices)
-                        graph_row_index = (clicked_index * 2) + 1
-                        
-                        if graph_row_index < len(graph_rows):
-                            # Extract the original graph data
-                            graph_row = graph_rows[graph_row_index]
-                            
-                            # Navigate through the nested structure to get the graph
-                            try:
-                                # graph_row -> props -> children -> props -> children (the actual graph)
-                                graph_data = graph_row['props']['children']['props']['children']
-                                
-                                # Extract graph properties from the dict representation
-                                graph_id = graph_data['props']['id']
-                                elements = graph_data['props']['elements']
-                                layout = graph_data['props']['layout']
-                                stylesheet = graph_data['props']['stylesheet']
-                                
-                                # Create the fullscreen version with larger dimensions
-                                fullscreen_graph = cyto.Cytoscape(
-                                                        id={"type": "fullscreen-graph", "index": clicked_index},
-                                                        elements=elements,
-                                                        layout=layout,
-                                                        stylesheet=stylesheet,
-                                                        style={"height": "100%", "width": "100%"},
-                                                    )
-
-                                modal_title = f"Cluster {clicked_index + 1}"
-                                return True, modal_title, [fullscreen_graph]
-                                
-                            except (KeyError, TypeError) as e:
-                                print(f"Error extracting graph data: {e}")
-                                raise PreventUpdate
-                                
                 except (json.JSONDecodeError, KeyError) as e:
                     print(f"Error parsing trigger ID: {e}")
                     raise PreventUpdate
+
+                if clicked_index is None or not 0 <= clicked_index < self.graph_builder.get_cluster_count(dataset_name, k_value):
+                    raise PreventUpdate
+
+                # Elements and layout come from the server-side graph cache, the stylesheet is applied in the browser
+                pruning = self.get_pruning(mode, node_value, edge_value, keep_connected)
+                graph_data = self.graph_builder.get_graph_data(dataset_name, k_value, clicked_index, pruning)
+
+                # Create the fullscreen version with larger dimensions
+                fullscreen_graph = cyto.Cytoscape(
+                                        id={"type": "fullscreen-graph", "index": clicked_index},
+                                        elements=graph_data["elements"],
+                                        layout=graph_data["layout"],
+                                        style={"height": "100%", "width": "100%"},
+                                    )
+
+                modal_title = f"Cluster {clicked_index + 1}"
+                return True, modal_title, [fullscreen_graph]
             
             raise PreventUpdate
 
-        @self.app.callback(
+        # The shared stylesheet is sent once per dataset load and reused by every graph
+        for graph_type in ("graph", "fullscreen-graph"):
+            self.app.clientside_callback(
+                APPLY_STYLESHEET,
+                Output({"type": graph_type, "index": MATCH}, "stylesheet"),
+                Input({"type": graph_type, "index": MATCH}, "id"),
+                State("graph-stylesheet", "data"),
+            )
+
+        # Tooltips are handled in the browser, hovering never reaches the server
+        self.app.clientside_callback(
+            DISPLAY_TOOLTIP,
             [Output("tooltip", "children"),
              Output("tooltip-interval", "disabled")],
             [Input({"type": "graph", "index": ALL}, "mouseoverNodeData"),
              Input({"type": "graph", "index": ALL}, "mouseoverEdgeData")],
             prevent_initial_call=True
         )
-        def display_tooltip(node_data_list, edge_data_list):
-            ctx = callback_context
-            tooltip_text = ""
-            if not ctx.triggered:
-                return [tooltip_text, True]
-
-            # Get the most recent trigger
-            trigger_id = ctx.triggered[0]['prop_id']
-            
-            # Extract the graph index from the trigger ID
-            # Example trigger_id: '{"index":0,"type":"graph"}.mouseoverNodeData'
-            import json
-            try:
-                # Remove the property part to get just the component ID
-                component_id_str = trigger_id.split('.')[0]
-                component_id = json.loads(component_id_str)
-                triggered_graph_index = component_id['index']
-            except (json.JSONDecodeError, KeyError, IndexError) as e:
-                print(f"Error parsing trigger ID: {e}")
-                return [tooltip_text, True]
-            # Check if the trigger was from a node mouseover
-            if "mouseoverNodeData" in trigger_id:
-                # Only check the data from the triggered graph
-                if triggered_graph_index < len(node_data_list) and node_data_list[triggered_graph_index]:
-                    node_data = node_data_list[triggered_graph_index]
-                    tooltip_text = f"{node_data['id']}, Frequency: {node_data['frequency']}"
-                    return [tooltip_text, False]  # Show tooltip and enable interval
-            
-            # Check if the trigger was from an edge mouseover
-            elif "mouseoverEdgeData" in trigger_id:
-                # Only check the data from the triggered graph
-                if triggered_graph_index < len(edge_data_list) and edge_data_list[triggered_graph_index]:
-                    edge_data = edge_data_list[triggered_graph_index]
-                    tooltip_text = f"{edge_data['source']} → {edge_data['target']}, Weight: {edge_data['weight']}"
-                    return [tooltip_text, False]  # Show tooltip and enable interval
-
-            return [tooltip_text, True]  # Hide tooltip and disable interval
 
         # Hide tooltip after interval
-        @self.app.callback(
+        self.app.clientside_callback(
+            HIDE_TOOLTIP,
             [Output("tooltip", "children", allow_duplicate=True),
              Output("tooltip-interval", "disabled", allow_duplicate=True)],
             [Input("tooltip-interval", "n_intervals")],
             prevent_initial_call=True
         )
-        def hide_tooltip_after_delay(n_intervals):
-            tooltip_text = ""
-            if n_intervals > 0:
-                return [tooltip_text, True]  # Hide tooltip and disable interval
-            return [tooltip_text, True]
 
         # Modal tooltip callbacks - listen to fullscreen graphs
-        @self.app.callback(
+        self.app.clientside_callback(
+            DISPLAY_TOOLTIP,
             [Output("modal-tooltip", "children"),
              Output("modal-tooltip-interval", "disabled")],
             [Input({"type": "fullscreen-graph", "index": ALL}, "mouseoverNodeData"),
              Input({"type": "fullscreen-graph", "index": ALL}, "mouseoverEdgeData")],
             prevent_initial_call=True
         )
-        def display_modal_tooltip(node_data_list, edge_data_list):
-            ctx = callback_context
-            tooltip_text = ""
-            if not ctx.triggered:
-                return [tooltip_text, True]
-
-            trigger_id = ctx.triggered[0]['prop_id']
-            
-            # Check if the trigger was from a node mouseover
-            if "mouseoverNodeData" in trigger_id:
-                # Always use index 0 since there's only one graph in the modal
-                if node_data_list and node_data_list[0]:
-                    node_data = node_data_list[0]
-                    tooltip_text = f"{node_data['id']}, Frequency: {node_data['frequency']}"
-                    return [tooltip_text, False]
-            
-            # Check if the trigger was from an edge mouseover
-            elif "mouseoverEdgeData" in trigger_id:
-                # Always use index 0 since there's only one graph in the modal
-                if edge_data_list and edge_data_list[0]:
-                    edge_data = edge_data_list[0]
-                    tooltip_text = f"{edge_data['source']} → {edge_data['target']}, Weight: {edge_data['weight']}"
-                    return [tooltip_text, False]
-
-            return [tooltip_text, True]
 
         # Hide modal tooltip after interval
-        @self.app.callback(
+        self.app.clientside_callback(
+            HIDE_TOOLTIP,
             [Output("modal-tooltip", "children", allow_duplicate=True),
              Output("modal-tooltip-interval", "disabled", allow_duplicate=True)],
             [Input("modal-tooltip-interval", "n_intervals")],
             prevent_initial_call=True
         )
-        def hide_modal_tooltip_after_delay(n_intervals):
-            tooltip_text = ""
-            if n_intervals > 0:
-                return [tooltip_text, True]
-            return [tooltip_text, True]
\ No newline at end of file
@@ -0,0 +1,151 @@
+import threading
+
+import numpy as np
+from scipy import sparse
+
+
+class ClusterLineage:
+    """
+    How clusters split and merge between consecutive k values of a clustering.
+
+    For a pair of consecutive k values, a sparse contingency matrix (clusters at
+    k x clusters at the next k) holds the summed frequency of the sequences the
+    two clusters share. Parents and children of a cluster are then a slice of
+    one matrix row.
+
+    Nothing is computed when a dataset loads. The matrix of a pair is built the
+    first time a query needs it, which parses the two label rows if they are
+    still lazy and costs one pass over the sequences, then it is kept. Loading
+    stays as flat as the lazy clustering below, the price is paid by the first
+    query of each pair instead.
+
+    Clusters with identical members at different k values are recognised by
+    their identity: the number of members and a wrapping sum of fixed random
+    64-bit keys of their rows. It is computed from the labels of one k only, so
+    matching a cluster across k values never parses the other k values.
+    """
+
+    def __init__(self, clustering, seed=0):
+        self.clustering = clustering
+        self.seed = seed
+        self.ks = [int(k) for k in clustering.ks]
+        self.next_ks = dict(zip(self.ks[:-1], self.ks[1:]))
+        self.previous_ks = dict(zip(self.ks[1:], self.ks[:-1]))
+        self.pairs = {}
+        self.identities = {}
+        self.frequencies = {}
+        self.row_keys = None
+        self.lock = threading.Lock()
+
+    def pair(self, k):
+        """
+        Contingency matrices between k and the next k, built on first use.
+
+        Returns:
+            tuple: (clusters at k x clusters at next k, its transpose) CSR matrices, None for the last k.
+        """
+        next_k = self.next_ks.get(k)
+        if next_k is None:
+            return None
+        if k not in self.pairs:
+            with self.lock:
+                if k not in self.pairs:
+                    labels = np.asarray(self.clustering.labels(k), dtype=np.int64)
+                    next_labels = np.asarray(self.clustering.labels(next_k), dtype=np.int64)
+                    shared = (labels >= 0) & (next_labels >= 0)
+                    # Duplicate (parent, child) pairs are summed by the conversion to CSR
+                    forward = sparse.csr_matrix(
+                        (self.clustering.store.frequencies[shared], (labels[shared], next_labels[shared])),
+                        shape=(int(labels.max(initial=-1)) + 1, int(next_labels.max(initial=-1)) + 1),
+                    )
+                    self.pairs[k] = (forward, forward.T.tocsr())
+        return self.pairs[k]
+
+    @staticmethod
+    def row(matrix, cluster_id):
+        if matrix is None or not 0 <= cluster_id < matrix.shape[0]:
+            return {}
+        start, end = matrix.indptr[cluster_id], matrix.indptr[cluster_id + 1]
+        return {int(other): int(weight) for other, weight in zip(matrix.indices[start:end], matrix.data[start:end])}
+
+    def next_k(self, k):
+        return self.next_ks.get(k)
+
+    def previous_k(self, k):
+        return self.previous_ks.get(k)
+
+    def children(self, k, cluster_id):
+        """
+        Clusters of the next k that take members of a cluster.
+
+        Returns:
+            dict: Cluster id at next_k(k) -> summed frequency of the sequences moving there.
+        """
+        pair = self.pair(k)
+        return self.row(pair[0], cluster_id) if pair is not None else {}
+
+    def parents(self, k, cluster_id):
+        """
+        Clusters of the previous k that the members of a cluster come from.
+
+        Returns:
+            dict: Cluster id at previous_k(k) -> summed frequency of the sequences coming from there.
+        """
+        previous_k = self.previous_ks.get(k)
+        pair = self.pair(previous_k) if previous_k is not None else None
+        return self.row(pair[1], cluster_id) if pair is not None else {}
+
+    def frequency(self, k, cluster_id):
+        if k not in self.frequencies:
+            self.frequencies[k] = self.clustering.cluster_frequencies(k)
+        frequencies = self.frequencies[k]
+        return int(frequencies[cluster_id]) if 0 <= cluster_id < len(frequencies) else 0
+
+    def identity(self, k, cluster_id):
+        """
+        Key equal for clusters with the same members, whatever their k and cluster id.
+
+        Returns:
+            tuple: Number of members and the wrapping sum of their row keys.
+        """
+        if k not in self.identities:
+            if self.row_keys is None:
+                rng = np.random.default_rng(self.seed)
+                self.row_keys = rng.integers(np.iinfo(np.uint64).max, size=len(self.clustering.store), dtype=np.uint64)
+            labels = np.asarray(self.clustering.labels(k), dtype=np.int64)
+            rows = np.flatnonzero(labels >= 0)
+            rows = rows[np.argsort(labels[rows], kind="stable")]
+            cluster_ids, starts, sizes = np.unique(labels[rows], return_index=True, return_counts=True)
+            n_clusters = int(cluster_ids.max(initial=-1)) + 1
+            counts = np.zeros(n_clusters, dtype=np.int64)
+            sums = np.zeros(n_clusters, dtype=np.uint64)
+            counts[cluster_ids] = sizes
+            if len(rows):
+                # uint64 additions wrap around, which keeps the sum a well mixed 64-bit key
+                sums[cluster_ids] = np.add.reduceat(self.row_keys[rows], starts)
+            self.identities[k] = (counts, sums)
+        counts, sums = self.identities[k]
+        return int(counts[cluster_id]), int(sums[cluster_id])
+
+    def locate(self, sequence_id, k):
+        # Cluster id of a sequence at k, None where it is not clustered
+        row = int(self.clustering.store.rows([sequence_id])[0])
+        cluster_id = int(self.clustering.labels(k)[row])
+        return cluster_id if cluster_id >= 0 else None
+
+    def trajectory(self, sequence_id):
+        """
+        Where a sequence goes as k grows. Parses every k that is still lazy.
+
+        Returns:
+            dict: k -> cluster id of the sequence, for every k where it is clustered.
+        """
+        row = int(self.clustering.store.rows([sequence_id])[0])
+        labels = ((k, int(self.clustering.labels(k)[row])) for k in self.ks)
+        return {k: label for k, label in labels if label >= 0}
+
+    def nbytes(self):
+        matrices = [matrix for pair in list(self.pairs.values()) for matrix in pair]
+        arrays = [array for identity in list(self.identities.values()) for array in identity]
+        return (sum(m.data.nbytes + m.indices.nbytes + m.indptr.nbytes for m in matrices)
+                + sum(array.nbytes for array in arrays) + (self.row_keys.nbytes if self.row_keys is not None else 0))
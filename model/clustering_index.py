@@ -0,0 +1,143 @@
+import os
+import json
+import mmap
+import threading
+from collections import OrderedDict
+
+
+class ClusteringIndex:
+    """
+    Lazy, read-only view of a clustering_<dataset>.txt file.
+
+    A single scan records the byte range of every `k:` block in a sidecar index,
+    next to the file unless another index_path is given. Blocks are parsed on demand from a memory-mapped file and
+    behave like the `{cluster_id: [sequence ids]}` dicts of the eager parser.
+    close() unmaps the file, a block requested afterwards maps it again.
+    """
+
+    INDEX_SUFFIX = ".idx.json"
+
+    def __init__(self, path, max_cached_blocks=8, index_path=None):
+        self.path = path
+        self.index_path = index_path or path + self.INDEX_SUFFIX
+        self.max_cached_blocks = max_cached_blocks
+        self.blocks = OrderedDict()
+        self.lock = threading.Lock()
+        self.mm = None
+
+        self.offsets = self.load_index()
+        if self.offsets is None:
+            with self.lock:
+                self.offsets = self.build_index(self.mapped())
+            self.save_index()
+
+    def mapped(self):
+        # Called with the lock held
+        if self.mm is None:
+            with open(self.path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                # Empty files cannot be memory-mapped; the map keeps its own handle on the file
+                self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        return self.mm
+
+    def source_signature(self):
+        stat = os.stat(self.path)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def load_index(self):
+        if not os.path.exists(self.index_path):
+            return None
+        try:
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+            # Rebuild the index if the clustering file changed since it was written
+            if index.get("source") != self.source_signature():
+                return None
+            return {int(k): (start, end) for k, start, end in index["offsets"]}
+        except Exception as e:
+            print(f"Failed to read clustering index {self.index_path}: {e}")
+            return None
+
+    def build_index(self, mm):
+        starts = []
+        position = 0 if mm[:2] == b"k:" else self.find_block(mm, 0)
+        while position != -1:
+            line_end = mm.find(b"\n", position)
+            line_end = len(mm) if line_end == -1 else line_end
+            starts.append((int(mm[position + 2:line_end].strip()), position))
+            position = self.find_block(mm, line_end)
+
+        # Each block runs until the next `k:` line; repeated k values keep the last block
+        offsets = {}
+        for i, (k, start) in enumerate(starts):
+            end = starts[i + 1][1] if i + 1 < len(starts) else len(mm)
+            offsets[k] = (start, end)
+        return offsets
+
+    @staticmethod
+    def find_block(mm, position):
+        # Blocks start at lines beginning with `k:`
+        found = mm.find(b"\nk:", position)
+        return -1 if found == -1 else found + 1
+
+    def save_index(self):
+        index = {
+            "source": self.source_signature(),
+            "offsets": [[k, start, end] for k, (start, end) in self.offsets.items()],
+        }
+        try:
+            os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+            with open(self.index_path, "w") as f:
+                json.dump(index, f)
+        except OSError as e:
+            # A read-only data folder only costs a rescan on the next load
+            print(f"Failed to write clustering index {self.index_path}: {e}")
+
+    def parse_block(self, k):
+        start, end = self.offsets[k]
+        with self.lock:
+            block = self.mapped()[start:end]
+        clustering = {}
+        for line in block.decode().splitlines():
+            if line.startswith("cluster;"):
+                line_array = line.split(';')
+                cluster_id = int(line_array[1].strip())
+                nodes = list(line_array[2].strip().split(':')[1].strip().split(','))
+                clustering[cluster_id] = nodes
+        return clustering
+
+    def get(self, k, default=None):
+        if k not in self.offsets:
+            return default
+        with self.lock:
+            if k in self.blocks:
+                self.blocks.move_to_end(k)
+                return self.blocks[k]
+        block = self.parse_block(k)
+        with self.lock:
+            self.blocks[k] = block
+            while len(self.blocks) > self.max_cached_blocks:
+                self.blocks.popitem(last=False)
+        return block
+
+    def __getitem__(self, k):
+        if k not in self.offsets:
+            raise KeyError(k)
+        return self.get(k)
+
+    def __contains__(self, k):
+        return k in self.offsets
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def keys(self):
+        return self.offsets.keys()
+
+    def close(self):
+        # Safe to call more than once
+        with self.lock:
+            if isinstance(self.mm, mmap.mmap):
+                self.mm.close()
+            self.mm = None
+            self.blocks.clear()
@@ -0,0 +1,82 @@
+import threading
+
+import numpy as np
+
+
+class ClusteringLabels:
+    """
+    Compact clustering representation: a (k values x sequences) matrix of cluster ids.
+
+    Column j holds the labels of the sequence at row j of the SequenceStore, -1 where
+    a sequence is not part of the clustering for that k. Rows are filled from a lazy
+    source (such as a ClusteringIndex) the first time each k is requested.
+    """
+
+    def __init__(self, ks, store, source=None, matrix=None):
+        self.ks = np.asarray(sorted(ks), dtype=np.int64)
+        self.k_rows = {int(k): row for row, k in enumerate(self.ks)}
+        self.store = store
+        self.source = source
+        self.lock = threading.Lock()
+
+        if matrix is not None:
+            self.matrix = matrix
+            self.loaded = np.ones(len(self.ks), dtype=bool)
+        else:
+            dtype = np.int16 if self.ks.max(initial=0) < np.iinfo(np.int16).max else np.int32
+            # Untouched rows of an empty matrix take no physical memory
+            self.matrix = np.empty((len(self.ks), len(store)), dtype=dtype)
+            self.loaded = np.zeros(len(self.ks), dtype=bool)
+
+    @classmethod
+    def from_source(cls, source, store):
+        return cls(list(source.keys()), store, source=source)
+
+    def labels(self, k):
+        row = self.k_rows[k]
+        if not self.loaded[row]:
+            with self.lock:
+                if not self.loaded[row]:
+                    self.matrix[row] = -1
+                    for cluster_id, ids in self.source.get(k).items():
+                        self.matrix[row, self.store.rows(ids)] = cluster_id
+                    self.loaded[row] = True
+        return self.matrix[row]
+
+    def cluster_sizes(self, k):
+        labels = self.labels(k)
+        return np.bincount(labels[labels >= 0], minlength=k + 1)
+
+    def cluster_frequencies(self, k):
+        labels = self.labels(k)
+        members = labels >= 0
+        return np.bincount(labels[members], weights=self.store.frequencies[members], minlength=k + 1).astype(np.int64)
+
+    def members(self, k):
+        labels = self.labels(k)
+        rows = np.flatnonzero(labels >= 0)
+        ids = self.store.ids[rows]
+        # Group by cluster id, keeping sequence ids ascending within each cluster
+        order = np.lexsort((ids, labels[rows]))
+        cluster_ids, starts = np.unique(labels[rows][order], return_index=True)
+        groups = np.split(ids[order], starts[1:])
+        return {int(cluster_id): group for cluster_id, group in zip(cluster_ids, groups)}
+
+    def get(self, k, default=None):
+        if k not in self.k_rows:
+            return default
+        return self.members(k)
+
+    def __getitem__(self, k):
+        if k not in self.k_rows:
+            raise KeyError(k)
+        return self.members(k)
+
+    def __contains__(self, k):
+        return k in self.k_rows
+
+    def __len__(self):
+        return len(self.ks)
+
+    def keys(self):
+        return self.k_rows.keys()
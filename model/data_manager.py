@@ -1,13 +1,31 @@
 import os
+import hashlib
+import numpy as np
 import pandas as pd
 
+from model.sequence_store import SequenceStore
+from model.dfg_engine import DFGEngine
+from model.clustering_index import ClusteringIndex
+from model.clustering_labels import ClusteringLabels
+from model.cluster_lineage import ClusterLineage
+from model.ngram_index import NgramIndex
+from model.dataset_bundle import DatasetBundle
+from utils.metrics import timed
+
 class DataManager:
-    def __init__(self, data_folder: str = "data/"):
+    def __init__(self, data_folder: str = "data/", mmap_bundle: bool = True, bundle_folder: str = None):
         self.data_root = data_folder
+        self.mmap_bundle = mmap_bundle
+        # Where save_bundle and the clustering index write, data/<dataset>/ is only read when set
+        self.bundle_folder = bundle_folder
         self.data = {}
         self.datasets = {}
         self.dataset = None
+        self.dataset_root = None
         self.file_paths = {}
+        self.bundle = None
+        self.saved_bundle = None
+        self.version = None
 
         self.load_datasets()
 
@@ -21,30 +39,113 @@ class DataManager:
 
     def load_dataset(self, dataset_name):
         self.dataset = dataset_name
-        self.data_root = os.path.join(self.data_root, dataset_name)
-        event_types_path = os.path.join(self.data_root, "event_types_" + dataset_name + ".csv")
-        clustering_path = os.path.join(self.data_root, "clustering_" + dataset_name + ".txt")
-        good_k_path = os.path.join(self.data_root, "good_k_" + dataset_name + ".txt")
-        unique_sequences_path = os.path.join(self.data_root, "unique_sequences_" + dataset_name + ".csv")
+        # Keep data_root pointing at the datasets folder so later loads resolve correctly
+        self.dataset_root = os.path.join(self.data_root, dataset_name)
+        event_types_path = os.path.join(self.dataset_root, "event_types_" + dataset_name + ".csv")
+        clustering_path = os.path.join(self.dataset_root, "clustering_" + dataset_name + ".txt")
+        good_k_path = os.path.join(self.dataset_root, "good_k_" + dataset_name + ".txt")
+        unique_sequences_path = os.path.join(self.dataset_root, "unique_sequences_" + dataset_name + ".csv")
         self.file_paths = {
             "event_types": event_types_path,
             "clustering": clustering_path,
             "good_k": good_k_path,
             "unique_sequences": unique_sequences_path,
         }
+        self.bundle = DatasetBundle.for_dataset(self.dataset_root, dataset_name)
+        self.saved_bundle = self.bundle
+        if self.bundle_folder:
+            self.saved_bundle = DatasetBundle.for_dataset(self.bundle_folder, dataset_name)
 
-    def load_files(self):
+    @timed("load_files")
+    def load_files(self, use_bundle=True, progress=None):
+        # progress(stage) is called before each loading stage, e.g. to report it to the UI
+        report = progress or (lambda stage: None)
+        # Identify this load by the state of the source files
+        self.version = self.compute_version()
+        # Prefer the compiled bundle when it is newer than the source files
+        bundle = self.get_fresh_bundle() if use_bundle else None
+        if bundle is not None:
+            try:
+                report("bundle")
+                self.load_bundle(bundle)
+                return
+            except Exception as e:
+                print(f"Failed to load bundle {bundle.path}, reading source files instead: {e}")
         # Load event types from the database
+        report("event_types")
         self.data["event_types"] = self.load_event_types()
         # Create acronym for event types
         self.data["event_types_acronyms"] = self.create_event_types_acronyms(self.data["event_types"])
-        # Load clustering data
+        # Load unique sequences
+        report("unique_sequences")
+        self.data["unique_sequences"] = self.load_unique_sequences()
+        # Index unique sequences by id
+        self.data["sequence_store"] = self.create_sequence_store(self.data["unique_sequences"])
+        # Encode sequences for the DFG engine
+        self.data["dfg_engine"] = self.create_dfg_engine(self.data["sequence_store"], self.data["event_types"])
+        # Index activity n-grams for pattern search
+        self.data["ngram_index"] = self.create_ngram_index(self.data["sequence_store"])
+        # Load clustering data as labels over the indexed sequences
+        report("clustering")
         self.data["clustering"] = self.load_clustering()
+        # Lineage between consecutive k values, computed per pair of k on first use
+        self.data["lineage"] = self.create_cluster_lineage(self.data["clustering"])
         # Load good k values
+        report("good_k")
         self.data["good_k"] = self.load_good_k()
-        # Load unique sequences
-        self.data["unique_sequences"] = self.load_unique_sequences()
 
+    @timed("load_bundle")
+    def load_bundle(self, bundle=None):
+        bundle = bundle or self.bundle
+        manifest, arrays = bundle.read(mmap=self.mmap_bundle)
+        self.data["event_types"] = {int(key): value for key, value in manifest["event_types"].items()}
+        self.data["event_types_acronyms"] = manifest["event_types_acronyms"]
+        # The DataFrame is only rebuilt from the store if something asks for it
+        self.data["unique_sequences"] = None
+        self.data["sequence_store"] = SequenceStore(arrays["ids"], arrays["frequencies"], arrays["events"], arrays["offsets"])
+        self.data["dfg_engine"] = self.create_dfg_engine(self.data["sequence_store"], self.data["event_types"])
+        self.data["ngram_index"] = self.create_ngram_index(self.data["sequence_store"])
+        self.data["clustering"] = ClusteringLabels(arrays["ks"], self.data["sequence_store"], matrix=arrays["labels"])
+        self.data["lineage"] = self.create_cluster_lineage(self.data["clustering"])
+        self.data["good_k"] = manifest["good_k"]
+        print(f"{'Attached' if self.mmap_bundle else 'Loaded'} compiled bundle with {len(self.data['sequence_store'])} "
+              f"sequences and {len(self.data['clustering'])} k values from {bundle.path}")
+
+    def compile_bundle(self):
+        # Always compile from the source files
+        self.load_files(use_bundle=False)
+        manifest = self.bundle.write(self)
+        print(f"Compiled {self.dataset} into {self.bundle.path}")
+        return manifest
+
+    def get_fresh_bundle(self):
+        # A compiled bundle next to the source files first, then one saved by an earlier load
+        for bundle in dict.fromkeys((self.bundle, self.saved_bundle)):
+            if bundle is not None and bundle.is_fresh(self.file_paths):
+                return bundle
+        return None
+
+    def save_bundle(self):
+        # Compile the loaded files into a bundle unless an up to date one already exists
+        if self.get_fresh_bundle() is not None:
+            return False
+        try:
+            self.saved_bundle.write(self)
+            print(f"Compiled {self.dataset} into {self.saved_bundle.path}")
+            return True
+        except Exception as e:
+            print(f"Failed to write bundle {self.saved_bundle.path}: {e}")
+            return False
+
+    def compute_version(self):
+        digest = hashlib.sha1(str(self.dataset).encode())
+        for name, path in sorted(self.file_paths.items()):
+            if os.path.exists(path):
+                stat = os.stat(path)
+                digest.update(f"{name}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+        return digest.hexdigest()[:16]
+
+    @timed("load_event_types")
     def load_event_types(self):
         types = {}
         if os.path.exists(self.file_paths["event_types"]):
@@ -57,29 +158,29 @@ class DataManager:
             except Exception as e:
                 print(f"Failed to load data from {self.file_paths['event_types']}: {e}")
         else:
-            print(f"Event types file {self.file_paths['event_files']} does not exist.")
+            print(f"Event types file {self.file_paths['event_types']} does not exist.")
         return types
 
+    @timed("load_clustering")
     def load_clustering(self):
         clustering = {}
         if os.path.exists(self.file_paths["clustering"]):
             try:
-                with open(self.file_paths["clustering"], "r") as f:
-                    for line in f:
-                        if 'k' in line:
-                            k = int(line.split(':')[1].strip())
-                            clustering[k] = {}
-                        if 'cluster' in line:
-                            line_array = line.split(';')
-                            cluster_id = int(line_array[1].strip())
-                            nodes = list(line_array[2].strip().split(':')[1].strip().split(','))
-                            clustering[k][cluster_id] = nodes
+                # Index the k blocks once; each block is parsed into a label row when it is first requested
+                index_path = None
+                if self.bundle_folder:
+                    index_path = os.path.join(self.bundle_folder, os.path.basename(self.file_paths["clustering"])
+                                              + ClusteringIndex.INDEX_SUFFIX)
+                index = ClusteringIndex(self.file_paths["clustering"], index_path=index_path)
+                clustering = ClusteringLabels.from_source(index, self.data["sequence_store"])
+                print(f"Indexed {len(clustering)} k values from {self.file_paths['clustering']}")
             except Exception as e:
                 print(f"Failed to load clustering data from {self.file_paths['clustering']}: {e}")
         else:
             print(f"Clustering file {self.file_paths['clustering']} does not exist.")
         return clustering
 
+    @timed("load_good_k")
     def load_good_k(self):
         good_k = {}
         if os.path.exists(self.file_paths["good_k"]):
@@ -100,6 +201,7 @@ class DataManager:
             print(f"Good k file {self.file_paths['good_k']} does not exist.")
         return good_k
 
+    @timed("load_unique_sequences")
     def load_unique_sequences(self):
         if os.path.exists(self.file_paths["unique_sequences"]):
             try:
@@ -115,6 +217,48 @@ class DataManager:
             print(f"Unique sequences file {self.file_paths['unique_sequences']} does not exist.")
             return None
 
+    @timed("create_sequence_store")
+    def create_sequence_store(self, unique_sequences):
+        if unique_sequences is None:
+            return None
+        try:
+            store = SequenceStore.from_dataframe(unique_sequences)
+            print(f"Indexed {len(store)} unique sequences with {len(store.events)} events")
+            return store
+        except Exception as e:
+            print(f"Failed to index unique sequences: {e}")
+            return None
+
+    @timed("create_dfg_engine")
+    def create_dfg_engine(self, store, event_types):
+        if store is None or not event_types:
+            return None
+        try:
+            return DFGEngine(store, event_types.keys())
+        except Exception as e:
+            print(f"Failed to encode sequences for the DFG engine: {e}")
+            return None
+
+    @timed("create_ngram_index")
+    def create_ngram_index(self, store):
+        if store is None:
+            return None
+        try:
+            return NgramIndex(store)
+        except Exception as e:
+            print(f"Failed to index activity n-grams: {e}")
+            return None
+
+    @timed("create_cluster_lineage")
+    def create_cluster_lineage(self, clustering):
+        if not clustering:
+            return None
+        try:
+            return ClusterLineage(clustering)
+        except Exception as e:
+            print(f"Failed to index the cluster lineage: {e}")
+            return None
+
     def get_max_k(self):
         if self.data.get("clustering"):
             return max(self.data["clustering"].keys(), default=None)
@@ -131,14 +275,112 @@ class DataManager:
     def get_good_k(self):
         return self.data.get("good_k", {}).get('good', None)
 
+    def is_stale(self):
+        # True when the source files changed after this dataset was loaded
+        return self.version is None or self.compute_version() != self.version
+
+    def get_version(self):
+        return self.version
+
+    def close(self):
+        # Release the mapped clustering file, a lazy k requested afterwards maps it again
+        source = getattr(self.data.get("clustering"), "source", None)
+        if source is not None:
+            source.close()
+
     def get_clustering(self, k):
         clustering = self.data.get("clustering", {}).get(k, None)
-        clustering = self.sort_clustering_by_frequency(clustering)
-        return clustering
+        if clustering is None:
+            return None
+        return {cluster_id: clustering[cluster_id] for cluster_id in self.sort_clustering_by_frequency(k)}
+
+    def get_cluster_labels(self, k):
+        return self.data["clustering"].labels(k)
+
+    def get_cluster_order(self, k):
+        return self.sort_clustering_by_frequency(k)
+
+    def get_cluster_lineage(self):
+        return self.data.get("lineage", None)
+
+    def get_ngram_index(self):
+        return self.data.get("ngram_index", None)
+
+    def parse_pattern(self, text):
+        """
+        Turn a pattern such as "Send Fine -> Add penalty -> Payment" into event type ids.
+
+        Activities are separated by arrows or commas and matched by name or acronym, ignoring case.
+
+        Returns:
+            list: Event type ids of the pattern, in order.
+
+        Raises:
+            ValueError: If an activity matches no event type, or an acronym shared by several.
+        """
+        names = {}
+        acronyms = {}
+        for event_id, event in self.get_event_types().items():
+            names[event.lower()] = event_id
+            acronyms.setdefault(self.get_event_types_acronyms()[event].lower(), []).append(event_id)
+        pattern = []
+        for part in text.replace("\u2192", ",").replace("->", ",").split(","):
+            part = part.strip().lower()
+            if not part:
+                continue
+            if part in names:
+                pattern.append(int(names[part]))
+            elif len(acronyms.get(part, [])) == 1:
+                pattern.append(int(acronyms[part][0]))
+            elif part in acronyms:
+                events = ", ".join(self.get_event_types()[event_id] for event_id in acronyms[part])
+                raise ValueError(f"Ambiguous activity '{part}', use one of {events}")
+            else:
+                raise ValueError(f"Unknown activity '{part}'")
+        return pattern
+
+    @timed("search_clusters")
+    def search_clusters(self, pattern, k):
+        """
+        Rank the clusters of k by the frequency of their sequences containing a pattern.
+
+        Args:
+            pattern (list): Event type ids of directly-following activities.
+            k (int): Number of clusters.
+
+        Returns:
+            list: (cluster_id, matching frequency, matching sequences, cluster frequency) tuples,
+                most matching frequency first.
+        """
+        index = self.get_ngram_index()
+        if index is None or k not in self.data.get("clustering", {}):
+            return []
+        rows = index.search(pattern)
+        clustering = self.data["clustering"]
+        labels = clustering.labels(k)[rows]
+        clustered = labels >= 0
+        rows, labels = rows[clustered], labels[clustered].astype(np.int64)
+        if not len(rows):
+            return []
+        frequencies = np.bincount(labels, weights=self.get_sequence_store().frequencies[rows]).astype(np.int64)
+        counts = np.bincount(labels)
+        totals = clustering.cluster_frequencies(k)
+        cluster_ids = np.flatnonzero(counts)
+        cluster_ids = cluster_ids[np.argsort(-frequencies[cluster_ids], kind="stable")]
+        return [(int(cluster_id), int(frequencies[cluster_id]), int(counts[cluster_id]), int(totals[cluster_id]))
+                for cluster_id in cluster_ids]
 
     def get_unique_sequences(self):
+        if self.data.get("unique_sequences") is None and self.get_sequence_store() is not None:
+            self.data["unique_sequences"] = self.get_sequence_store().to_dataframe()
         return self.data.get("unique_sequences", None)
 
+    def get_sequence_store(self):
+        return self.data.get("sequence_store", None)
+
+    def get_dfg_engine(self):
+        return self.data.get("dfg_engine", None)
+
     def get_event_types(self):
         return self.data.get("event_types", None)
 
@@ -148,20 +390,18 @@ class DataManager:
     def get_available_datasets(self):
         return [{"label": label, "value": key} for key, label in self.datasets.items()]
 
-    def sort_clustering_by_frequency(self, clustering):
-        unique_sequences = self.get_unique_sequences()
-
-        k_frequencies = {}
+    @timed("sort_clustering_by_frequency")
+    def sort_clustering_by_frequency(self, k):
+        clustering = self.data["clustering"]
 
-        for k, ids in clustering.items():
-            total_frequency = 0
-            for id in ids:
-                total_frequency += unique_sequences.loc[unique_sequences['id_uniqueSeq'] == int(id), 'frequency'].values[0]
-            k_frequencies[k] = total_frequency
+        # Total frequency per cluster id, from the label row of k
+        sizes = clustering.cluster_sizes(k)
+        k_frequencies = clustering.cluster_frequencies(k)
 
-        # Sort clustering by frequency
-        sorted_clustering = dict(sorted(clustering.items(), key=lambda item: k_frequencies[item[0]], reverse=True))
-        return sorted_clustering
+        # Sort cluster ids by frequency, ties keep ascending cluster id order
+        cluster_ids = np.flatnonzero(sizes)
+        sorted_ids = cluster_ids[np.argsort(-k_frequencies[cluster_ids], kind="stable")]
+        return [int(cluster_id) for cluster_id in sorted_ids]
 
     def create_event_types_acronyms(self, event_types):
         acronyms = {}
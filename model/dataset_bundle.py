@@ -0,0 +1,124 @@
+import os
+import json
+import time
+import shutil
+
+import numpy as np
+
+
+class DatasetBundle:
+    """
+    Compiled binary form of a data/<dataset>/ folder.
+
+    A bundle is a directory holding one .npy file per array (encoded sequences,
+    frequencies, clustering label matrix) and a JSON manifest with the small
+    metadata (event types, acronyms, good/best k) and the source file signatures.
+    """
+
+    FORMAT_VERSION = 1
+    MANIFEST = "manifest.json"
+    ARRAYS = ("ids", "frequencies", "events", "offsets", "ks", "labels")
+
+    def __init__(self, path):
+        self.path = path
+        self.manifest_path = os.path.join(path, self.MANIFEST)
+
+    @classmethod
+    def for_dataset(cls, dataset_root, dataset_name):
+        return cls(os.path.join(dataset_root, dataset_name + ".bundle"))
+
+    def exists(self):
+        return os.path.exists(self.manifest_path)
+
+    def is_fresh(self, file_paths):
+        # The bundle is only used when it was written after every source file
+        if not self.exists():
+            return False
+        bundle_mtime = os.stat(self.manifest_path).st_mtime_ns
+        for path in file_paths.values():
+            if os.path.exists(path) and os.stat(path).st_mtime_ns > bundle_mtime:
+                return False
+        return self.validate(file_paths)
+
+    def validate(self, file_paths):
+        """
+        Check that the bundle was compiled from the current source files.
+
+        Args:
+            file_paths (dict): Source file name -> path, as in DataManager.file_paths.
+
+        Returns:
+            bool: True if every recorded source signature matches the file on disk.
+        """
+        try:
+            sources = self.read_manifest().get("sources", {})
+        except Exception as e:
+            print(f"Failed to read bundle manifest {self.manifest_path}: {e}")
+            return False
+        current = {
+            name: {"size": os.stat(path).st_size, "mtime_ns": os.stat(path).st_mtime_ns}
+            for name, path in file_paths.items() if os.path.exists(path)
+        }
+        return sources == current
+
+    def read_manifest(self):
+        with open(self.manifest_path, "r") as f:
+            manifest = json.load(f)
+        if manifest.get("format_version") != self.FORMAT_VERSION:
+            raise ValueError(f"Unsupported bundle format {manifest.get('format_version')} in {self.path}")
+        return manifest
+
+    def write(self, data_manager):
+        store = data_manager.get_sequence_store()
+        clustering = data_manager.data["clustering"]
+        # Materialise every label row before saving the matrix
+        for k in clustering.ks:
+            clustering.labels(int(k))
+
+        arrays = {
+            "ids": store.ids,
+            "frequencies": store.frequencies,
+            "events": store.events,
+            "offsets": store.offsets,
+            "ks": clustering.ks,
+            "labels": clustering.matrix,
+        }
+        manifest = {
+            "format_version": self.FORMAT_VERSION,
+            "dataset": data_manager.dataset,
+            "created": time.time(),
+            "sources": {
+                name: {"size": os.stat(path).st_size, "mtime_ns": os.stat(path).st_mtime_ns}
+                for name, path in data_manager.file_paths.items() if os.path.exists(path)
+            },
+            "event_types": {str(key): value for key, value in data_manager.get_event_types().items()},
+            "event_types_acronyms": data_manager.get_event_types_acronyms(),
+            "good_k": data_manager.data.get("good_k", {}),
+        }
+
+        # Write next to the final location and swap in, so readers never see a partial bundle.
+        # The temporary folder is per process since several workers may compile the same dataset
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_path, name + ".npy"), np.ascontiguousarray(array))
+        # The manifest is written last, its mtime marks the bundle as complete
+        with open(os.path.join(tmp_path, self.MANIFEST), "w") as f:
+            json.dump(manifest, f)
+        shutil.rmtree(self.path, ignore_errors=True)
+        try:
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # Another process swapped in its bundle first, keep that one
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            if not self.exists():
+                raise
+        return manifest
+
+    def read(self, mmap=False):
+        manifest = self.read_manifest()
+        # Read-only memory maps let every process that opens this bundle share the same physical pages
+        mmap_mode = "r" if mmap else None
+        arrays = {name: np.load(os.path.join(self.path, name + ".npy"), mmap_mode=mmap_mode) for name in self.ARRAYS}
+        return manifest, arrays
@@ -0,0 +1,98 @@
+import os
+import threading
+
+from model.data_manager import DataManager
+
+
+class DatasetRegistry:
+    """
+    Process-wide registry of loaded datasets.
+
+    Each dataset is loaded once into its own DataManager, which is never changed
+    afterwards and can be shared by every session and request thread. Concurrent
+    requests for the same dataset wait for a single load instead of repeating it.
+    """
+
+    def __init__(self, data_folder: str = "data/", mmap_bundle: bool = True, bundle_folder: str = None):
+        self.data_root = data_folder
+        self.mmap_bundle = mmap_bundle
+        self.bundle_folder = bundle_folder
+        self.datasets = {}
+        self.dataset_locks = {}
+        self.lock = threading.Lock()
+
+    def clone(self):
+        # Empty registry with the same settings, sharing no loaded dataset or lock with this one
+        return DatasetRegistry(self.data_root, self.mmap_bundle, self.bundle_folder)
+
+    def get_available_datasets(self):
+        try:
+            folders = sorted(name for name in os.listdir(self.data_root) if os.path.isdir(os.path.join(self.data_root, name)))
+        except Exception as e:
+            print(f"Failed to load datasets from {self.data_root}: {e}")
+            folders = []
+        return [{"label": folder, "value": folder} for folder in folders]
+
+    def get(self, dataset_name, version=None):
+        """
+        Loaded dataset, loading it on first use.
+
+        Args:
+            dataset_name (str): Name of the dataset folder.
+            version (str, optional): Version a session was given by a load, possibly in another server process.
+                The dataset is reloaded when this process holds a different one and the source files changed.
+        """
+        # Datasets already in memory are served without taking any lock
+        data_manager = self.datasets.get(dataset_name)
+        if data_manager is not None and (version is None or data_manager.get_version() == version):
+            return data_manager
+        return self.load(dataset_name)
+
+    def get_current(self, dataset_name):
+        # For clients without a session version: reloads as soon as the source files change
+        data_manager = self.get(dataset_name)
+        return self.load(dataset_name) if data_manager.is_stale() else data_manager
+
+    def load(self, dataset_name, progress=None):
+        with self.lock:
+            dataset_lock = self.dataset_locks.setdefault(dataset_name, threading.Lock())
+
+        # Only one thread loads a given dataset, the others wait and reuse its result
+        with dataset_lock:
+            previous = self.datasets.get(dataset_name)
+            if previous is not None and not previous.is_stale():
+                return previous
+
+            data_manager = DataManager(self.data_root, self.mmap_bundle, self.bundle_folder)
+            data_manager.load_dataset(dataset_name)
+            data_manager.load_files(progress=progress)
+            # Replace the reference atomically; sessions given another version catch up through get(dataset, version)
+            self.datasets[dataset_name] = data_manager
+            if previous is not None:
+                previous.close()
+            return data_manager
+
+    def validate_bundles(self):
+        # Startup check: report which compiled bundles, next to the data or in the bundle folder, no longer match
+        # their source files. A dataset is valid when one of its bundles is
+        status = {}
+        for option in self.get_available_datasets():
+            data_manager = DataManager(self.data_root, self.mmap_bundle, self.bundle_folder)
+            data_manager.load_dataset(option["value"])
+            bundles = [bundle for bundle in dict.fromkeys((data_manager.bundle, data_manager.saved_bundle))
+                       if bundle.exists()]
+            valid = [bundle.validate(data_manager.file_paths) for bundle in bundles]
+            if not bundles:
+                status[option["value"]] = "missing"
+            elif any(valid):
+                status[option["value"]] = "valid"
+            else:
+                status[option["value"]] = "stale"
+            for bundle, is_valid in zip(bundles, valid):
+                if not is_valid:
+                    print(f"Bundle {bundle.path} is stale, {option['value']} will not be attached from it. "
+                          f"Run `python cli.py compile {option['value']}` to rebuild it.")
+        return status
+
+    def loaded_datasets(self):
+        return dict(self.datasets)
@@ -0,0 +1,267 @@
+import heapq
+
+import numpy as np
+from scipy import sparse
+
+
+class DFGEngine:
+    """
+    Sparse-matrix directly-follows graph engine.
+
+    Every unique sequence is encoded once as a row of node counts
+    (sequences x event types) and a row of directly-follows pair counts
+    (sequences x observed event type pairs). The DFG of any set of clusters is
+    then the product of a frequency-weighted membership matrix with them.
+    """
+
+    def __init__(self, store, event_type_ids):
+        self.store = store
+        self.event_type_ids = np.asarray(sorted(int(id) for id in event_type_ids), dtype=np.int64)
+        n_sequences = len(store)
+        n_types = len(self.event_type_ids)
+
+        # Map event type ids to dense column indices
+        lookup = np.full(int(max(self.event_type_ids.max(initial=0), store.events.max(initial=0))) + 1, -1, dtype=np.int64)
+        lookup[self.event_type_ids] = np.arange(n_types, dtype=np.int64)
+        codes = lookup[store.events]
+        if (codes < 0).any():
+            raise ValueError(f"Sequences use unknown event types {np.unique(store.events[codes < 0]).tolist()}")
+        rows = np.repeat(np.arange(n_sequences, dtype=np.int64), store.lengths())
+
+        self.node_matrix = sparse.csr_matrix(
+            (np.ones(len(codes), dtype=np.int64), (rows, codes)), shape=(n_sequences, n_types)
+        )
+
+        # Directly-follows pairs are consecutive events of the same sequence
+        same_sequence = rows[:-1] == rows[1:]
+        pair_codes = codes[:-1][same_sequence] * n_types + codes[1:][same_sequence]
+        pairs, pair_columns = np.unique(pair_codes, return_inverse=True)
+        self.edge_sources = self.event_type_ids[pairs // max(n_types, 1)]
+        self.edge_targets = self.event_type_ids[pairs % max(n_types, 1)]
+        self.edge_matrix = sparse.csr_matrix(
+            (np.ones(len(pair_columns), dtype=np.int64), (rows[:-1][same_sequence], pair_columns)),
+            shape=(n_sequences, len(pairs)),
+        )
+
+        # First and last event of every non-empty sequence, the start and end activities of the DFG
+        non_empty = np.flatnonzero(store.lengths() > 0)
+        ones = np.ones(len(non_empty), dtype=np.int64)
+        self.start_matrix = sparse.csr_matrix(
+            (ones, (non_empty, codes[store.offsets[non_empty]])), shape=(n_sequences, n_types)
+        )
+        self.end_matrix = sparse.csr_matrix(
+            (ones, (non_empty, codes[store.offsets[non_empty + 1] - 1])), shape=(n_sequences, n_types)
+        )
+
+    def compute(self, labels, n_clusters):
+        """
+        Compute the DFGs of all clusters at once.
+
+        Args:
+            labels (np.ndarray): Cluster index (0 to n_clusters - 1) of each store row, -1 if unclustered.
+            n_clusters (int): Number of clusters.
+
+        Returns:
+            ClusterDFGs: Node and edge tables of every cluster.
+        """
+        labels = np.asarray(labels, dtype=np.int64)
+        members = np.flatnonzero(labels >= 0)
+        membership = sparse.csr_matrix(
+            (self.store.frequencies[members], (labels[members], members)), shape=(n_clusters, len(self.store))
+        )
+        return ClusterDFGs(self, membership @ self.node_matrix, membership @ self.edge_matrix,
+                           membership @ self.start_matrix, membership @ self.end_matrix)
+
+    def compute_ordered(self, labels, order):
+        # Re-index cluster ids so that order[i] becomes cluster index i
+        labels = np.asarray(labels, dtype=np.int64)
+        rank = np.full(max(int(labels.max(initial=0)), max(order, default=0)) + 1, -1, dtype=np.int64)
+        rank[np.asarray(order, dtype=np.int64)] = np.arange(len(order), dtype=np.int64)
+        ranked = np.where(labels >= 0, rank[np.maximum(labels, 0)], -1)
+        return self.compute(ranked, len(order))
+
+
+class ClusterDFGs:
+
+    def __init__(self, engine, node_counts, edge_counts, start_counts, end_counts):
+        self.engine = engine
+        self.node_counts = node_counts.tocsr()
+        self.edge_counts = edge_counts.tocsr()
+        self.start_counts = start_counts.tocsr()
+        self.end_counts = end_counts.tocsr()
+        for matrix in (self.node_counts, self.edge_counts, self.start_counts, self.end_counts):
+            matrix.eliminate_zeros()
+        # Entries of every cluster row by descending count, so thresholds are a binary search and a slice
+        self.node_order = self.sort_rows(self.node_counts)
+        self.edge_order = self.sort_rows(self.edge_counts)
+
+    def __len__(self):
+        return self.node_counts.shape[0]
+
+    def nbytes(self):
+        return sum(matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+                   for matrix in (self.node_counts, self.edge_counts, self.start_counts, self.end_counts)
+                   ) + self.node_order.nbytes + self.edge_order.nbytes
+
+    @staticmethod
+    def sort_rows(matrix):
+        rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+        return np.lexsort((-matrix.data, rows))
+
+    @staticmethod
+    def keep_count(counts, threshold):
+        # counts are sorted in descending order
+        if threshold is None or len(counts) == 0:
+            return len(counts)
+        mode, value = threshold
+        if mode == "top":
+            return min(max(0, int(value)), len(counts))
+        # Keep the entries of at least value percent of the most frequent one
+        min_count = counts[0] * float(value) / 100
+        return int(np.searchsorted(-counts, -min_count, side="right"))
+
+    def sorted_entries(self, matrix, order, index):
+        start, end = matrix.indptr[index], matrix.indptr[index + 1]
+        entries = order[start:end]
+        return matrix.indices[entries], matrix.data[entries]
+
+    def event_counts(self, matrix, index):
+        start, end = matrix.indptr[index], matrix.indptr[index + 1]
+        columns = matrix.indices[start:end]
+        counts = matrix.data[start:end]
+        return {int(event): int(count) for event, count in zip(self.engine.event_type_ids[columns], counts) if count}
+
+    def nodes(self, index):
+        return self.event_counts(self.node_counts, index)
+
+    def starts(self, index):
+        # Start activities of a cluster with the number of sequences starting with them
+        return self.event_counts(self.start_counts, index)
+
+    def ends(self, index):
+        return self.event_counts(self.end_counts, index)
+
+    def edges(self, index):
+        start, end = self.edge_counts.indptr[index], self.edge_counts.indptr[index + 1]
+        columns = self.edge_counts.indices[start:end]
+        counts = self.edge_counts.data[start:end]
+        sources = self.engine.edge_sources[columns]
+        targets = self.engine.edge_targets[columns]
+        return {(int(source), int(target)): int(count) for source, target, count in zip(sources, targets, counts) if count}
+
+    @staticmethod
+    def widest_tree(roots, neighbours):
+        """
+        Widest (maximum bottleneck) paths from a set of weighted roots.
+
+        Args:
+            roots (dict): Root event -> width it starts with.
+            neighbours (dict): Event -> list of (next event, edge count).
+
+        Returns:
+            dict: Every reachable event -> the event before it on its widest path, None for the roots.
+        """
+        width = dict(roots)
+        previous = dict.fromkeys(roots)
+        heap = [(-count, event) for event, count in roots.items()]
+        heapq.heapify(heap)
+        done = set()
+        while heap:
+            count, event = heapq.heappop(heap)
+            if event in done:
+                continue
+            done.add(event)
+            for other, edge_count in neighbours.get(event, ()):
+                bottleneck = min(-count, edge_count)
+                if bottleneck > width.get(other, 0):
+                    width[other] = bottleneck
+                    previous[other] = event
+                    heapq.heappush(heap, (-bottleneck, other))
+        return previous
+
+    def connecting_paths(self, index, events, sources, targets, counts):
+        """
+        Start and end activities of a cluster and the widest start to end paths through a set of its events.
+
+        Returns:
+            tuple: The set of events on the paths and the set of (source, target) edges they use.
+        """
+        # Neighbour lists keep the descending count order of the edges
+        outgoing, incoming = {}, {}
+        for source, target, count in zip(sources.tolist(), targets.tolist(), counts.tolist()):
+            outgoing.setdefault(source, []).append((target, count))
+            incoming.setdefault(target, []).append((source, count))
+        # Walking the tree from the starts back, and the one from the ends forward, gives a start to end path
+        starts, ends = self.starts(index), self.ends(index)
+        from_start = self.widest_tree(starts, outgoing)
+        to_end = self.widest_tree(ends, incoming)
+
+        nodes = set(events.tolist()) | set(starts) | set(ends)
+        edges = set()
+
+        def walk(event):
+            for tree, forward in ((from_start, False), (to_end, True)):
+                current = event
+                while tree.get(current) is not None:
+                    edges.add((current, tree[current]) if forward else (tree[current], current))
+                    current = tree[current]
+                    nodes.add(current)
+
+        for event in list(nodes):
+            walk(event)
+        # An event that both starts and ends sequences is a path of its own, it is linked by its strongest edge
+        linked = {event for edge in edges for event in edge}
+        for event in nodes - linked:
+            if event in outgoing:
+                other = outgoing[event][0][0]
+                edges.add((event, other))
+            elif event in incoming:
+                other = incoming[event][0][0]
+                edges.add((other, event))
+            else:
+                continue
+            nodes.add(other)
+            walk(other)
+        return nodes, edges
+
+    def prune(self, index, node_threshold=None, edge_threshold=None, keep_connected=False):
+        """
+        Nodes and edges of a cluster that pass frequency thresholds.
+
+        Args:
+            index (int): Cluster index.
+            node_threshold (tuple, optional): ("percent", p) keeps nodes with at least p% of the most frequent
+                node's count, ("top", n) keeps the n most frequent nodes. None keeps every node.
+            edge_threshold (tuple, optional): Same for edges, which are also dropped when an end node is pruned.
+            keep_connected (bool): Also keep the start and end activities of the cluster, and the nodes and edges
+                of the widest start to end path through every kept node, so that no kept node is left isolated.
+
+        Returns:
+            tuple: The {event_id: count} nodes and {(source, target): count} edges dicts.
+        """
+        node_columns, node_counts = self.sorted_entries(self.node_counts, self.node_order, index)
+        events = self.engine.event_type_ids[node_columns]
+        keep_nodes = np.zeros(len(events), dtype=bool)
+        keep_nodes[:self.keep_count(node_counts, node_threshold)] = True
+
+        edge_columns, edge_counts = self.sorted_entries(self.edge_counts, self.edge_order, index)
+        sources = self.engine.edge_sources[edge_columns]
+        targets = self.engine.edge_targets[edge_columns]
+
+        path_edges = set()
+        if keep_connected and len(events):
+            path_nodes, path_edges = self.connecting_paths(index, events[keep_nodes], sources, targets, edge_counts)
+            keep_nodes |= np.isin(events, list(path_nodes))
+        events, node_counts = events[keep_nodes], node_counts[keep_nodes]
+
+        # Edges between kept nodes, still by descending count
+        between = np.flatnonzero(np.isin(sources, events) & np.isin(targets, events))
+        keep = np.zeros(len(edge_counts), dtype=bool)
+        keep[between[:self.keep_count(edge_counts[between], edge_threshold)]] = True
+        if path_edges:
+            keep |= np.array([edge in path_edges for edge in zip(sources.tolist(), targets.tolist())], dtype=bool)
+
+        nodes = {int(event): int(count) for event, count in zip(events, node_counts)}
+        edges = {(int(source), int(target)): int(count)
+                 for source, target, count in zip(sources[keep], targets[keep], edge_counts[keep])}
+        return nodes, edges
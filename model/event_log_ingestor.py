@@ -0,0 +1,166 @@
+import os
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+
+class EventLogIngestor:
+    """
+    Builds the event_types and unique_sequences files of a dataset from a raw event log.
+
+    The log (one row per event with a case id, an activity and a timestamp) is read
+    in chunks. The events of a chunk are sorted by case and timestamp and folded into
+    a trie of variants as they stream in: a case only keeps the trie node of its
+    variant so far and its last timestamp, and each variant is counted from the nodes
+    the cases end on. Memory grows with the number of cases and distinct variants,
+    not with the number of events in the log.
+
+    A case may span chunks as long as its events do not go back in time from one
+    chunk to the next, which holds for logs ordered by time or grouped by case.
+    """
+
+    def __init__(self, case_column="case_id", activity_column="activity", timestamp_column="timestamp",
+                 timestamp_format=None, chunk_size=1_000_000):
+        self.case_column = case_column
+        self.activity_column = activity_column
+        self.timestamp_column = timestamp_column
+        self.timestamp_format = timestamp_format
+        self.chunk_size = chunk_size
+        self.activities = {}
+        self.reset()
+
+    def reset(self):
+        # Trie of variants: node 0 is the empty variant, every other node extends its parent by one activity
+        self.children = {}
+        self.parents = [-1]
+        self.labels = [0]
+        # Case id -> (trie node, last timestamp)
+        self.cases = {}
+
+    def ingest(self, log_path, data_folder, dataset_name):
+        """
+        Read an event log and write the files DataManager.load_dataset expects.
+
+        Args:
+            log_path (str): CSV event log with the case, activity and timestamp columns.
+            data_folder (str): Folder holding one sub-folder per dataset.
+            dataset_name (str): Name of the dataset folder to write.
+
+        Returns:
+            dict: Counts of events, cases, variants and activities, with the throughput in events per second.
+
+        Raises:
+            ValueError: If the events of a case go back in time from one chunk to the next.
+        """
+        start = time.perf_counter()
+        self.activities = {}
+        self.reset()
+        dataset_root = os.path.join(data_folder, dataset_name)
+        os.makedirs(dataset_root, exist_ok=True)
+
+        events = self.read_log(log_path)
+        variants = self.count_variants()
+        cases = len(self.cases)
+        self.reset()
+
+        self.write_event_types(os.path.join(dataset_root, "event_types_" + dataset_name + ".csv"))
+        self.write_unique_sequences(os.path.join(dataset_root, "unique_sequences_" + dataset_name + ".csv"), variants)
+
+        elapsed = time.perf_counter() - start
+        stats = {
+            "events": events,
+            "cases": cases,
+            "variants": len(variants),
+            "activities": len(self.activities),
+            "seconds": elapsed,
+            "events_per_second": events / elapsed if elapsed else 0.0,
+        }
+        print(f"Ingested {events} events of {cases} cases into {len(variants)} variants of {len(self.activities)} "
+              f"activities in {elapsed:.1f}s ({stats['events_per_second']:.0f} events/s)")
+        return stats
+
+    def read_log(self, log_path):
+        events = 0
+        start = time.perf_counter()
+        columns = [self.case_column, self.activity_column, self.timestamp_column]
+        reader = pd.read_csv(log_path, usecols=columns, dtype={self.case_column: str, self.activity_column: str},
+                             chunksize=self.chunk_size)
+        for chunk in reader:
+            chunk = chunk.dropna(subset=[self.case_column, self.activity_column])
+            # Activities get ids in order of first appearance
+            for activity in chunk[self.activity_column].unique():
+                self.activities.setdefault(activity, len(self.activities) + 1)
+            timestamps = pd.to_datetime(chunk[self.timestamp_column], format=self.timestamp_format, utc=True)
+            self.fold_chunk(chunk[self.case_column].to_numpy(),
+                            timestamps.to_numpy(dtype="datetime64[ns]").view("int64"),
+                            chunk[self.activity_column].map(self.activities).to_numpy(dtype=np.int32))
+            events += len(chunk)
+            elapsed = time.perf_counter() - start
+            print(f"Read {events} events of {len(self.cases)} cases ({events / elapsed if elapsed else 0:.0f} events/s)")
+        return events
+
+    def fold_chunk(self, cases, timestamps, activities):
+        if not len(cases):
+            return
+        codes, names = pd.factorize(cases)
+        # Stable sort keeps the log order of events sharing a timestamp
+        order = np.lexsort((timestamps, codes))
+        codes, timestamps, activities = codes[order], timestamps[order], activities[order]
+
+        bounds = np.flatnonzero(np.diff(codes)) + 1
+        starts = np.concatenate(([0], bounds))
+        ends = np.concatenate((bounds, [len(codes)]))
+        # Cases of a chunk often continue the same variant the same way, each distinct step is walked once
+        steps = {}
+        for case, s, e in zip(names[codes[starts]], starts, ends):
+            node, last = self.cases.get(case, (0, None))
+            if last is not None and timestamps[s] < last:
+                raise ValueError(f"Events of case {case} go back in time across chunks of {self.chunk_size} events, "
+                                 f"sort the log by timestamp or use a larger chunk size")
+            # The raw bytes of the activity ids are a cheap hashable key for the events of the case in this chunk
+            key = (node, activities[s:e].tobytes())
+            if key not in steps:
+                steps[key] = self.extend(node, activities[s:e])
+            self.cases[case] = (steps[key], int(timestamps[e - 1]))
+
+    def extend(self, node, activities):
+        # Trie node reached from node through activities, adding the missing nodes
+        for activity in activities.tolist():
+            child = self.children.get((node, activity))
+            if child is None:
+                child = len(self.parents)
+                self.children[(node, activity)] = child
+                self.parents.append(node)
+                self.labels.append(activity)
+            node = child
+        return node
+
+    def variant(self, node):
+        sequence = []
+        while node > 0:
+            sequence.append(self.labels[node])
+            node = self.parents[node]
+        return sequence[::-1]
+
+    def count_variants(self):
+        # Cases ending on the same trie node share their variant
+        counts = Counter(node for node, _ in self.cases.values())
+        return {tuple(self.variant(node)): count for node, count in sorted(counts.items())}
+
+    def write_event_types(self, path):
+        df = pd.DataFrame({"id_eventType": list(self.activities.values()), "type": list(self.activities.keys())})
+        df.to_csv(path, index=False)
+        print(f"Wrote {len(df)} event types to {path}")
+
+    def write_unique_sequences(self, path, variants):
+        # Most frequent variants get the lowest ids
+        ranked = sorted(variants.items(), key=lambda item: -item[1])
+        df = pd.DataFrame({
+            "id_uniqueSeq": np.arange(1, len(ranked) + 1),
+            "frequency": [frequency for _, frequency in ranked],
+            "sequence": ["-".join(map(str, sequence)) for sequence, _ in ranked],
+        })
+        df.to_csv(path, index=False)
+        print(f"Wrote {len(df)} unique sequences to {path}")
@@ -0,0 +1,107 @@
+import numpy as np
+
+
+class NgramIndex:
+    """
+    Inverted index from activity n-grams to the sequences containing them.
+
+    For every gram length 1..n, the distinct grams are kept as sorted integer
+    keys, and the rows of the SequenceStore containing each gram as a sorted
+    posting list in one flat array. Longer patterns are answered by
+    intersecting the posting lists of their n-grams, then checking that the
+    remaining candidates contain the pattern contiguously.
+    """
+
+    def __init__(self, store, n=3):
+        self.store = store
+        self.n = n
+        # Event ids are digits of a base large enough for every id
+        self.base = int(store.events.max(initial=0)) + 1
+        self.keys = {}
+        self.offsets = {}
+        self.postings = {}
+
+        events = store.events.astype(np.int64)
+        rows = np.repeat(np.arange(len(store), dtype=np.int64), store.lengths())
+        for length in range(1, n + 1):
+            if len(events) < length:
+                starts = np.empty(0, dtype=np.int64)
+            else:
+                # A gram starts at every position whose last event is still in the same sequence
+                starts = np.flatnonzero(rows[:len(rows) - length + 1] == rows[length - 1:])
+            keys = np.zeros(len(starts), dtype=np.int64)
+            for i in range(length):
+                keys = keys * self.base + events[starts + i]
+            gram_rows = rows[starts]
+
+            # Sort by gram then row, dropping grams repeated within a sequence
+            order = np.lexsort((gram_rows, keys))
+            keys, gram_rows = keys[order], gram_rows[order]
+            distinct = np.ones(len(keys), dtype=bool)
+            distinct[1:] = (keys[1:] != keys[:-1]) | (gram_rows[1:] != gram_rows[:-1])
+            keys, gram_rows = keys[distinct], gram_rows[distinct]
+
+            unique_keys, first = np.unique(keys, return_index=True)
+            self.keys[length] = unique_keys
+            self.offsets[length] = np.append(first, len(keys)).astype(np.int64)
+            self.postings[length] = gram_rows.astype(np.int32)
+
+    def encode(self, gram):
+        key = 0
+        for event in gram:
+            key = key * self.base + int(event)
+        return key
+
+    def posting(self, gram):
+        # Sorted store rows of the sequences containing gram, with len(gram) <= n
+        gram = [int(event) for event in gram]
+        if not gram or any(not 0 <= event < self.base for event in gram):
+            return np.empty(0, dtype=np.int32)
+        keys = self.keys[len(gram)]
+        key = self.encode(gram)
+        position = np.searchsorted(keys, key)
+        if position == len(keys) or keys[position] != key:
+            return np.empty(0, dtype=np.int32)
+        return self.postings[len(gram)][self.offsets[len(gram)][position]:self.offsets[len(gram)][position + 1]]
+
+    def search(self, pattern):
+        """
+        Find the sequences containing a pattern of directly-following activities.
+
+        Args:
+            pattern (list): Event type ids, in order.
+
+        Returns:
+            np.ndarray: Sorted store rows of the matching sequences.
+        """
+        pattern = [int(event) for event in pattern]
+        if not pattern:
+            return np.empty(0, dtype=np.int32)
+        if len(pattern) <= self.n:
+            return self.posting(pattern)
+
+        # Intersect the shortest posting lists first, so the candidates shrink as fast as possible
+        grams = {tuple(pattern[i:i + self.n]) for i in range(len(pattern) - self.n + 1)}
+        postings = sorted((self.posting(gram) for gram in grams), key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            if not len(candidates):
+                break
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+
+        # Every gram occurring somewhere does not make the whole pattern contiguous, check the remaining rows
+        needle = np.asarray(pattern, dtype=self.store.events.dtype).tobytes()
+        width = self.store.events.dtype.itemsize
+        matches = [row for row in candidates if self.contains(self.store.sequence(row).tobytes(), needle, width)]
+        return np.asarray(matches, dtype=np.int32)
+
+    @staticmethod
+    def contains(haystack, needle, width):
+        # Byte search restricted to matches aligned on whole events
+        position = haystack.find(needle)
+        while position != -1 and position % width:
+            position = haystack.find(needle, position + 1)
+        return position != -1
+
+    def nbytes(self):
+        return sum(array.nbytes for arrays in (self.keys, self.offsets, self.postings) for array in arrays.values())
@@ -0,0 +1,212 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from scipy import sparse
+from scipy.cluster import hierarchy
+
+from model.dfg_engine import DFGEngine
+
+# Features and output buffer shared with the distance workers, set once per worker process
+_features = None
+_condensed = None
+
+
+def _init_distance_worker(features, shm_name):
+    global _features, _condensed
+    _features = features
+    shm = shared_memory.SharedMemory(name=shm_name)
+    n = len(features)
+    _condensed = (shm, np.ndarray(n * (n - 1) // 2, dtype=np.float64, buffer=shm.buf))
+
+
+def _distance_rows(start, stop):
+    _write_condensed_rows(_features, _condensed[1], start, stop)
+
+
+def _condensed_offset(n, row):
+    return row * n - row * (row + 1) // 2
+
+
+def _write_condensed_rows(features, condensed, start, stop):
+    # Cosine distances of rows start..stop to every later row, in condensed (upper triangle) order
+    n = len(features)
+    block = 1.0 - features[start:stop] @ features.T
+    np.clip(block, 0.0, 2.0, out=block)
+    for row in range(start, stop):
+        offset = _condensed_offset(n, row)
+        condensed[offset:offset + n - row - 1] = block[row - start, row + 1:]
+
+
+class SequenceClusterer:
+    """
+    Agglomerative clustering of the unique sequences of a dataset.
+
+    Each sequence is described by its event and directly-follows pair counts,
+    compared with the cosine distance. The pairwise distances are computed in row
+    chunks on a process pool and a single linkage run gives the whole hierarchy,
+    from which every k is cut. The good k values are the local maxima of the
+    frequency-weighted Calinski-Harabasz score and the best k is its maximum.
+    The score keeps growing as clusters approach single sequences, so it is
+    only compared up to max_good_k (twice the square root of the number of
+    sequences by default).
+    """
+
+    def __init__(self, method="average", max_workers=None, chunk_size=256, max_good_k=None):
+        self.method = method
+        self.max_good_k = max_good_k
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+    def features(self, store):
+        # Frequencies weight the quality score, the features describe the shape of each sequence
+        engine = DFGEngine(store, np.unique(store.events))
+        features = sparse.hstack([engine.node_matrix, engine.edge_matrix]).toarray().astype(np.float64)
+        norms = np.linalg.norm(features, axis=1)
+        features /= np.where(norms > 0, norms, 1.0)[:, None]
+        return features
+
+    def distances(self, features):
+        n = len(features)
+        size = n * (n - 1) // 2
+        chunks = [(start, min(start + self.chunk_size, n)) for start in range(0, n, self.chunk_size)]
+
+        if self.max_workers == 1 or len(chunks) == 1:
+            condensed = np.empty(size, dtype=np.float64)
+            for start, stop in chunks:
+                _write_condensed_rows(features, condensed, start, stop)
+            return condensed
+
+        # Workers write their rows straight into shared memory, nothing but chunk bounds goes through the pool
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1) * 8)
+        try:
+            with ProcessPoolExecutor(self.max_workers, initializer=_init_distance_worker,
+                                     initargs=(features, shm.name)) as executor:
+                for future in [executor.submit(_distance_rows, start, stop) for start, stop in chunks]:
+                    future.result()
+            return np.ndarray(size, dtype=np.float64, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def cluster(self, store, max_k=None):
+        """
+        Cluster the sequences of a store for every k from 1 to max_k.
+
+        Args:
+            store (SequenceStore): Unique sequences to cluster.
+            max_k (int, optional): Largest number of clusters, defaults to one less than the number of sequences.
+
+        Returns:
+            tuple: The linkage matrix and the Calinski-Harabasz scores up to max_good_k as a {k: score} dict.
+        """
+        n = len(store)
+        max_k = max(1, min(max_k or n - 1, n))
+        if n < 2:
+            return np.empty((0, 4)), {}
+        start = time.perf_counter()
+        features = self.features(store)
+
+        linkage = hierarchy.linkage(self.distances(features), method=self.method)
+        print(f"Clustered {n} sequences with {features.shape[1]} features in {time.perf_counter() - start:.1f}s")
+        max_good_k = min(max_k, self.max_good_k or max(2, int(2 * np.sqrt(n))))
+        return linkage, self.scores(linkage, features, store.frequencies.astype(np.float64), max_good_k)
+
+    @staticmethod
+    def node_ranges(linkage, n):
+        # Every node of the dendrogram covers a contiguous range of its leaf order
+        leaves = hierarchy.leaves_list(linkage) if n > 1 else np.zeros(1, dtype=np.int64)
+        lows = np.zeros(2 * n - 1, dtype=np.int64)
+        lows[leaves] = np.arange(n)
+        for i, (a, b) in enumerate(linkage[:, :2].astype(np.int64)):
+            lows[n + i] = min(lows[a], lows[b])
+        return leaves, lows
+
+    @staticmethod
+    def splits(linkage, n, max_k, lows):
+        # Going from k to k + 1 clusters undoes merge n - 1 - k, its second child starts a new range
+        for k in range(1, max_k):
+            a, b = linkage[n - 1 - k, :2].astype(np.int64)
+            yield k + 1, 2 * n - 1 - k, a, b, max(lows[a], lows[b])
+
+    def scores(self, linkage, features, weights, max_k):
+        n = len(features)
+        _, lows = self.node_ranges(linkage, n)
+        # Weighted feature sums and weights of every node, children before parents
+        sums = np.zeros((2 * n - 1, features.shape[1]))
+        totals = np.zeros(2 * n - 1)
+        sums[:n] = features * weights[:, None]
+        totals[:n] = weights
+        for i, (a, b) in enumerate(linkage[:, :2].astype(np.int64)):
+            sums[n + i] = sums[a] + sums[b]
+            totals[n + i] = totals[a] + totals[b]
+
+        def spread(node):
+            return sums[node] @ sums[node] / totals[node]
+
+        # Within-cluster scatter, updated by one split per k
+        total_weight = totals[-1]
+        scatter = float(weights @ (features * features).sum(axis=1))
+        total_scatter = scatter - spread(2 * n - 2)
+        within = total_scatter
+        scores = {}
+        for k, parent, a, b, _ in self.splits(linkage, n, max_k, lows):
+            within -= spread(a) + spread(b) - spread(parent)
+            if within > 1e-12 and total_weight > k:
+                scores[k] = ((total_scatter - within) / (k - 1)) / (within / (total_weight - k))
+        return scores
+
+    def write_clustering(self, path, linkage, store, max_k):
+        n = len(store)
+        max_k = max(1, min(max_k or n - 1, n))
+        leaves, lows = self.node_ranges(linkage, n)
+        ids = store.ids[leaves]
+        boundary = np.zeros(n + 1, dtype=bool)
+        boundary[[0, n]] = True
+
+        def write_k(f, k):
+            edges = np.flatnonzero(boundary)
+            f.write(f"k:{k}\n")
+            for cluster_id, (lo, hi) in enumerate(zip(edges[:-1], edges[1:]), start=1):
+                f.write(f"cluster;{cluster_id};node:{','.join(map(str, np.sort(ids[lo:hi]).tolist()))}\n")
+
+        with open(path, "w") as f:
+            write_k(f, 1)
+            for k, _, _, _, low in self.splits(linkage, n, max_k, lows):
+                boundary[low] = True
+                write_k(f, k)
+        print(f"Wrote clustering for k = 1..{max_k} to {path}")
+
+    @staticmethod
+    def write_good_k(path, scores, max_k):
+        good_k = []
+        best_k = max(scores, key=scores.get) if scores else 1
+        for k, score in sorted(scores.items()):
+            # Local maxima of the score along k
+            if score > scores.get(k - 1, -np.inf) and score >= scores.get(k + 1, -np.inf):
+                good_k.append(k)
+        with open(path, "w") as f:
+            f.write(f"numClusters:{max_k}\n")
+            f.write(f"bestK:{best_k}\n")
+            # The best k is repeated first, the loader skips it
+            f.write(f"goodKValues:{','.join(map(str, [best_k] + good_k))}\n")
+        print(f"Wrote best k {best_k} and {len(good_k)} good k values to {path}")
+        return best_k, good_k
+
+    def run(self, data_manager, max_k=None):
+        """
+        Cluster the unique sequences of a loaded dataset and write its clustering and good k files.
+
+        Args:
+            data_manager (DataManager): Manager on which load_dataset was called.
+            max_k (int, optional): Largest number of clusters to write.
+        """
+        store = data_manager.create_sequence_store(data_manager.load_unique_sequences())
+        if store is None or len(store) == 0:
+            raise ValueError(f"No unique sequences to cluster in {data_manager.file_paths['unique_sequences']}")
+        max_k = max(1, min(max_k or len(store) - 1, len(store)))
+        linkage, scores = self.cluster(store, max_k)
+        self.write_clustering(data_manager.file_paths["clustering"], linkage, store, max_k)
+        return self.write_good_k(data_manager.file_paths["good_k"], scores, max_k)
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+
+class SequenceStore:
+    """
+    Id-indexed, array-backed view of the unique sequences of a dataset.
+
+    Sequences are stored pre-split and integer-encoded in a flat `events` array,
+    with `offsets[row]:offsets[row + 1]` delimiting the events of each row.
+    """
+
+    def __init__(self, ids, frequencies, events, offsets):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.frequencies = np.asarray(frequencies, dtype=np.int64)
+        self.events = np.asarray(events, dtype=np.int32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+
+        # Dense id -> row lookup, -1 for ids that are not in the dataset
+        size = int(self.ids.max()) + 1 if len(self.ids) else 0
+        self.row_lookup = np.full(size, -1, dtype=np.int64)
+        self.row_lookup[self.ids] = np.arange(len(self.ids), dtype=np.int64)
+
+        for array in (self.ids, self.frequencies, self.events, self.offsets, self.row_lookup):
+            array.flags.writeable = False
+
+    @classmethod
+    def from_dataframe(cls, df):
+        sequences = [[int(event) for event in sequence.split('-')] for sequence in df['sequence'].astype(str)]
+        lengths = np.fromiter((len(sequence) for sequence in sequences), dtype=np.int64, count=len(sequences))
+        offsets = np.zeros(len(sequences) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        events = np.fromiter((event for sequence in sequences for event in sequence), dtype=np.int32, count=int(offsets[-1]))
+        return cls(df['id_uniqueSeq'].to_numpy(), df['frequency'].to_numpy(), events, offsets)
+
+    def to_dataframe(self):
+        sequences = ['-'.join(str(event) for event in self.sequence(row)) for row in range(len(self))]
+        return pd.DataFrame({"id_uniqueSeq": self.ids, "frequency": self.frequencies, "sequence": sequences})
+
+    def __len__(self):
+        return len(self.ids)
+
+    def rows(self, ids):
+        ids = np.asarray(ids, dtype=np.int64)
+        if ids.size and (ids.min() < 0 or ids.max() >= len(self.row_lookup)):
+            raise KeyError(f"Unknown sequence ids in {ids.tolist()}")
+        rows = self.row_lookup[ids]
+        if (rows < 0).any():
+            raise KeyError(f"Unknown sequence ids {ids[rows < 0].tolist()}")
+        return rows
+
+    def frequency(self, ids):
+        return self.frequencies[self.rows(ids)]
+
+    def total_frequency(self, ids):
+        return int(self.frequency(ids).sum())
+
+    def sequence(self, row):
+        return self.events[self.offsets[row]:self.offsets[row + 1]]
+
+    def lengths(self):
+        return np.diff(self.offsets)
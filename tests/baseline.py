@@ -0,0 +1,41 @@
+"""
+The computations of the first version of the app, which the optimized code is checked against.
+"""
+
+
+def parse_clustering(path):
+    clustering = {}
+    with open(path, "r") as f:
+        for line in f:
+            if 'k' in line:
+                k = int(line.split(':')[1].strip())
+                clustering[k] = {}
+            if 'cluster' in line:
+                line_array = line.split(';')
+                cluster_id = int(line_array[1].strip())
+                nodes = list(line_array[2].strip().split(':')[1].strip().split(','))
+                clustering[k][cluster_id] = nodes
+    return clustering
+
+
+def cluster_dfg(unique_sequences, ids):
+    nodes_dict = {}
+    edges_dict = {}
+    for id in ids:
+        sequence = unique_sequences.loc[unique_sequences['id_uniqueSeq'] == int(id), 'sequence'].values[0]
+        frequency = unique_sequences.loc[unique_sequences['id_uniqueSeq'] == int(id), 'frequency'].values[0]
+        sequence = sequence.split('-')
+        for event in sequence:
+            if event not in nodes_dict:
+                nodes_dict[event] = frequency
+            else:
+                nodes_dict[event] += frequency
+        for i in range(len(sequence) - 1):
+            edge = (sequence[i], sequence[i + 1])
+            if edge not in edges_dict:
+                edges_dict[edge] = frequency
+            else:
+                edges_dict[edge] += frequency
+    nodes = {int(event): int(freq) for event, freq in nodes_dict.items()}
+    edges = {(int(edge[0]), int(edge[1])): int(freq) for edge, freq in edges_dict.items()}
+    return nodes, edges
@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.generate_dataset import generate
+from model.data_manager import DataManager
+
+DATASET = "Fixture"
+
+
+@pytest.fixture(scope="session")
+def data_folder(tmp_path_factory):
+    # Small synthetic dataset in the four-file format, the same for every test run
+    folder = tmp_path_factory.mktemp("data")
+    generate(str(folder), DATASET, variants=300, event_types=8, min_length=2, max_length=10,
+             min_k=1, max_k=25, good_k=5, seed=0)
+    return str(folder)
+
+
+@pytest.fixture
+def dataset():
+    return DATASET
+
+
+@pytest.fixture
+def data_manager(data_folder):
+    # Loaded from the source files, nothing of the clustering parsed yet
+    data_manager = DataManager(data_folder)
+    data_manager.load_dataset(DATASET)
+    data_manager.load_files(use_bundle=False)
+    return data_manager
+
+
+@pytest.fixture(scope="session")
+def road_traffic(tmp_path_factory):
+    # The sample dataset shipped in data/, left untouched
+    data_manager = DataManager(os.path.join(ROOT, "data"), bundle_folder=str(tmp_path_factory.mktemp("bundles")))
+    data_manager.load_dataset("RoadTraffic")
+    data_manager.load_files(use_bundle=False)
+    return data_manager
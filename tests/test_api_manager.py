@@ -0,0 +1,69 @@
+import os
+import shutil
+
+import pytest
+from dash import Dash, html
+
+from controller.api_manager import ApiManager
+from model.dataset_registry import DatasetRegistry
+from view.graph_builder import GraphBuilder
+
+
+@pytest.fixture
+def api(data_folder, dataset, tmp_path):
+    folder = tmp_path / "data"
+    shutil.copytree(os.path.join(data_folder, dataset), folder / dataset,
+                    ignore=shutil.ignore_patterns("*.idx.json", "*.bundle"))
+    registry = DatasetRegistry(str(folder), bundle_folder=str(tmp_path / "bundles"))
+    app = Dash(__name__)
+    app.layout = html.Div()
+    ApiManager(app, registry, GraphBuilder(registry)).register_routes()
+    return app.server.test_client(), registry, str(folder)
+
+
+def set_best_k(folder, dataset, best_k):
+    path = os.path.join(folder, dataset, f"good_k_{dataset}.txt")
+    with open(path) as f:
+        lines = [f"bestK:{best_k}\n" if line.startswith("bestK:") else line for line in f]
+    with open(path, "w") as f:
+        f.writelines(lines)
+
+
+def test_source_changes_update_the_etag(api, dataset):
+    client, registry, folder = api
+    response = client.get(f"/api/v1/datasets/{dataset}")
+    etag = response.headers["ETag"]
+    assert client.get(f"/api/v1/datasets/{dataset}", headers={"If-None-Match": etag}).status_code == 304
+
+    set_best_k(folder, dataset, 3)
+    response = client.get(f"/api/v1/datasets/{dataset}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.get_json()["best_k"] == 3
+    assert response.get_json()["version"] == registry.get(dataset).compute_version()
+    listing = client.get("/api/v1/datasets").get_json()["datasets"]
+    assert listing == [{"name": dataset, "loaded": True, "version": response.get_json()["version"]}]
+
+
+def test_cluster_revalidation_parses_nothing(api, dataset):
+    client, registry, folder = api
+    path = f"/api/v1/datasets/{dataset}/k/7/clusters/2"
+    etag = client.get(path).headers["ETag"]
+
+    # A fresh process answers the revalidation without parsing or sorting the k row
+    cold = DatasetRegistry(folder, bundle_folder=os.path.join(os.path.dirname(folder), "bundles"))
+    app = Dash(__name__)
+    app.layout = html.Div()
+    ApiManager(app, cold, GraphBuilder(cold)).register_routes()
+    response = app.server.test_client().get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert not cold.get(dataset).data["clustering"].loaded.any()
+
+
+def test_unknown_cluster_rank(api, dataset):
+    client, registry, folder = api
+    assert client.get(f"/api/v1/datasets/{dataset}/k/7/clusters/7").status_code == 200
+    for rank in (0, 8):
+        response = client.get(f"/api/v1/datasets/{dataset}/k/7/clusters/{rank}")
+        assert response.status_code == 404
+        assert "has no cluster" in response.get_json()["error"]
@@ -0,0 +1,14 @@
+import pytest
+
+from controller.callbacks_manager import CallbacksManager
+
+
+@pytest.mark.parametrize("value", [None, 0, -1, -2.5, "3", "", True, float("nan"), float("inf")])
+def test_invalid_thresholds_do_not_prune(value):
+    assert CallbacksManager.get_threshold("top", value) is None
+    assert CallbacksManager.get_pruning("top", value, value, True) is None
+
+
+def test_positive_thresholds_prune():
+    assert CallbacksManager.get_pruning("top", 3, None, True) == (("top", 3), None, True)
+    assert CallbacksManager.get_pruning("percent", -5, 12.5, False) == (None, ("percent", 12.5), False)
@@ -0,0 +1,53 @@
+import numpy as np
+
+
+def test_load_parses_no_k(data_manager):
+    data_manager.get_cluster_lineage()
+    assert data_manager.data["clustering"].loaded.sum() == 0
+
+
+def test_pair_is_built_on_first_query(data_manager):
+    lineage = data_manager.get_cluster_lineage()
+    lineage.children(5, 1)
+    clustering = data_manager.data["clustering"]
+    assert clustering.loaded.sum() == 2
+    assert list(lineage.pairs) == [5]
+
+
+def test_children_and_parents_match_members(data_manager):
+    lineage = data_manager.get_cluster_lineage()
+    clustering = data_manager.data["clustering"]
+    store = data_manager.get_sequence_store()
+    for k in (1, 7, 24):
+        next_members = clustering.members(lineage.next_k(k))
+        for cluster_id, members in clustering.members(k).items():
+            expected = {}
+            for child_id, child_members in next_members.items():
+                shared = np.intersect1d(members, child_members)
+                if len(shared):
+                    expected[child_id] = store.total_frequency(shared)
+            assert lineage.children(k, cluster_id) == expected
+            assert sum(expected.values()) == lineage.frequency(k, cluster_id)
+            for child_id, weight in expected.items():
+                assert lineage.parents(lineage.next_k(k), child_id)[cluster_id] == weight
+
+
+def test_identity_matches_member_sets(data_manager):
+    lineage = data_manager.get_cluster_lineage()
+    clustering = data_manager.data["clustering"]
+    seen = {}
+    for k in lineage.ks:
+        for cluster_id, members in clustering.members(k).items():
+            members = tuple(np.sort(members).tolist())
+            identity = lineage.identity(k, cluster_id)
+            assert seen.setdefault(identity, members) == members
+    # The generated clustering splits one cluster per k, so most clusters repeat across k values
+    assert len(seen) < sum(len(clustering.members(k)) for k in lineage.ks)
+
+
+def test_locate_and_trajectory(data_manager):
+    lineage = data_manager.get_cluster_lineage()
+    sequence_id = int(data_manager.get_sequence_store().ids[0])
+    trajectory = lineage.trajectory(sequence_id)
+    assert sorted(trajectory) == lineage.ks
+    assert all(lineage.locate(sequence_id, k) == cluster_id for k, cluster_id in trajectory.items())
@@ -0,0 +1,104 @@
+import os
+import shutil
+
+import pytest
+
+from baseline import parse_clustering
+from model.clustering_index import ClusteringIndex
+from model.dataset_registry import DatasetRegistry
+
+ROAD_TRAFFIC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            "data", "RoadTraffic", "clustering_RoadTraffic.txt")
+
+
+@pytest.fixture(params=["fixture", "road_traffic"])
+def clustering_path(request, data_folder, dataset, tmp_path):
+    # Copied, so that the sidecar index is written next to the copy
+    source = ROAD_TRAFFIC if request.param == "road_traffic" else \
+        os.path.join(data_folder, dataset, f"clustering_{dataset}.txt")
+    path = str(tmp_path / os.path.basename(source))
+    shutil.copy(source, path)
+    return path
+
+
+def test_blocks_match_baseline_parser(clustering_path):
+    expected = parse_clustering(clustering_path)
+    index = ClusteringIndex(clustering_path)
+    assert sorted(index.keys()) == sorted(expected)
+    for k, clusters in expected.items():
+        assert index[k] == clusters
+
+
+def test_offsets_delimit_k_blocks(clustering_path):
+    index = ClusteringIndex(clustering_path)
+    with open(clustering_path, "rb") as f:
+        content = f.read()
+    ranges = sorted(index.offsets.values())
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(content)
+    assert all(end == next_start for (_, end), (next_start, _) in zip(ranges, ranges[1:]))
+    for k, (start, end) in index.offsets.items():
+        assert content[start:end].startswith(f"k:{k}\n".encode())
+        assert content[start:end].count(b"k:") == 1
+
+
+def test_sidecar_index_is_reused_and_rebuilt(clustering_path):
+    index = ClusteringIndex(clustering_path)
+    offsets = index.offsets
+    assert os.path.exists(clustering_path + ClusteringIndex.INDEX_SUFFIX)
+    assert ClusteringIndex(clustering_path).load_index() == offsets
+
+    with open(clustering_path, "a") as f:
+        f.write("k:999\ncluster;1;node:1\n")
+    # The saved index no longer matches the file
+    assert index.load_index() is None
+    index = ClusteringIndex(clustering_path)
+    assert index[999] == {1: ["1"]}
+    assert index.offsets[999][0] > max(start for k, (start, _) in offsets.items())
+
+
+def test_repeated_k_keeps_last_block(tmp_path):
+    path = str(tmp_path / "clustering.txt")
+    with open(path, "w") as f:
+        f.write("k:2\ncluster;1;node:1,2\nk:3\ncluster;1;node:1\nk:2\ncluster;1;node:3\ncluster;2;node:4\n")
+    index = ClusteringIndex(path)
+    assert index[2] == parse_clustering(path)[2] == {1: ["3"], 2: ["4"]}
+    assert index.get(5) is None
+    with pytest.raises(KeyError):
+        index[5]
+
+
+def test_empty_file(tmp_path):
+    path = str(tmp_path / "clustering.txt")
+    open(path, "w").close()
+    index = ClusteringIndex(path)
+    assert len(index) == 0
+    index.close()
+
+
+def test_close_is_idempotent_and_reopens(clustering_path):
+    index = ClusteringIndex(clustering_path)
+    k = max(index.keys())
+    block = index[k]
+    index.close()
+    index.close()
+    assert index.mm is None
+    assert index[k] == block
+    assert index.mm is not None
+    index.close()
+
+
+def test_registry_closes_replaced_dataset(data_folder, dataset, tmp_path):
+    folder = tmp_path / "data"
+    shutil.copytree(os.path.join(data_folder, dataset), folder / dataset)
+    registry = DatasetRegistry(str(folder), bundle_folder=str(tmp_path / "bundles"))
+    previous = registry.get(dataset)
+    index = previous.data["clustering"].source
+    index.get(min(index.keys()))
+    assert index.mm is not None
+
+    good_k = folder / dataset / f"good_k_{dataset}.txt"
+    stat = os.stat(good_k)
+    os.utime(good_k, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert registry.get(dataset) is previous
+    assert registry.load(dataset) is not previous
+    assert index.mm is None
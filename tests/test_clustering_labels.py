@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from baseline import parse_clustering
+from model.clustering_labels import ClusteringLabels
+from model.sequence_store import SequenceStore
+
+
+@pytest.fixture
+def expected(data_manager):
+    return parse_clustering(data_manager.file_paths["clustering"])
+
+
+def test_members_match_baseline_parser(data_manager, expected):
+    clustering = data_manager.data["clustering"]
+    assert sorted(clustering.keys()) == sorted(expected)
+    for k, clusters in expected.items():
+        members = clustering[k]
+        assert sorted(members) == sorted(clusters)
+        for cluster_id, ids in clusters.items():
+            assert members[cluster_id].tolist() == sorted(int(id) for id in ids)
+
+
+def test_sizes_frequencies_and_order_match_baseline(data_manager, expected):
+    unique_sequences = pd.read_csv(data_manager.file_paths["unique_sequences"]).set_index("id_uniqueSeq")
+    clustering = data_manager.data["clustering"]
+    for k in (1, 2, 9, 25):
+        frequencies = {cluster_id: int(unique_sequences.loc[[int(id) for id in ids], "frequency"].sum())
+                       for cluster_id, ids in expected[k].items()}
+        sizes = clustering.cluster_sizes(k)
+        cluster_frequencies = clustering.cluster_frequencies(k)
+        for cluster_id, ids in expected[k].items():
+            assert sizes[cluster_id] == len(ids)
+            assert cluster_frequencies[cluster_id] == frequencies[cluster_id]
+        # Clusters by descending frequency, ties in file order, as sort_clustering_by_frequency did
+        order = sorted(expected[k], key=lambda cluster_id: frequencies[cluster_id], reverse=True)
+        assert list(data_manager.get_clustering(k)) == order
+
+
+def test_rows_are_parsed_on_first_use(data_manager):
+    clustering = data_manager.data["clustering"]
+    assert not clustering.loaded.any()
+    clustering.labels(3)
+    assert clustering.loaded.sum() == 1
+    assert clustering.loaded[clustering.k_rows[3]]
+
+
+def test_matrix_matches_lazy_rows(data_manager):
+    lazy = data_manager.data["clustering"]
+    matrix = np.stack([lazy.labels(int(k)) for k in lazy.ks])
+    eager = ClusteringLabels(lazy.ks, lazy.store, matrix=matrix)
+    assert eager.loaded.all()
+    for k in lazy.keys():
+        assert {cluster_id: ids.tolist() for cluster_id, ids in eager[k].items()} == \
+            {cluster_id: ids.tolist() for cluster_id, ids in lazy[k].items()}
+
+
+def test_unclustered_sequences_and_unknown_k():
+    store = SequenceStore([10, 20, 30], [1, 2, 4], [1, 2, 1], [0, 1, 2, 3])
+    clustering = ClusteringLabels.from_source({2: {1: ["30"], 2: ["10"]}}, store)
+    assert clustering.labels(2).tolist() == [2, -1, 1]
+    assert clustering.cluster_sizes(2).tolist() == [0, 1, 1]
+    assert clustering.cluster_frequencies(2).tolist() == [0, 4, 1]
+    assert 3 not in clustering
+    assert clustering.get(3) is None
+    with pytest.raises(KeyError):
+        clustering[3]
@@ -0,0 +1,49 @@
+import os
+import shutil
+
+from model.data_manager import DataManager
+from model.dataset_registry import DatasetRegistry
+
+
+def test_loads_write_only_to_bundle_folder(data_folder, dataset, tmp_path):
+    folder = tmp_path / "data"
+    shutil.copytree(os.path.join(data_folder, dataset), folder / dataset,
+                    ignore=shutil.ignore_patterns("*.idx.json", "*.bundle"))
+    before = sorted(os.listdir(folder / dataset))
+    bundle_folder = str(tmp_path / "bundles")
+
+    data_manager = DataManager(str(folder), bundle_folder=bundle_folder)
+    data_manager.load_dataset(dataset)
+    data_manager.load_files(use_bundle=False)
+    assert data_manager.save_bundle()
+    assert os.path.exists(data_manager.saved_bundle.path)
+    assert data_manager.saved_bundle.path.startswith(bundle_folder)
+    assert data_manager.data["clustering"].source.index_path.startswith(bundle_folder)
+
+    # The next load attaches the saved bundle instead of reading the source files
+    reloaded = DataManager(str(folder), bundle_folder=bundle_folder)
+    reloaded.load_dataset(dataset)
+    assert reloaded.get_fresh_bundle() is reloaded.saved_bundle
+    reloaded.load_files()
+    assert len(reloaded.get_sequence_store()) == len(data_manager.get_sequence_store())
+    assert not reloaded.save_bundle()
+    assert sorted(os.listdir(folder / dataset)) == before
+
+
+def test_validate_bundles_checks_bundle_folder(data_folder, dataset, tmp_path):
+    folder = tmp_path / "data"
+    shutil.copytree(os.path.join(data_folder, dataset), folder / dataset,
+                    ignore=shutil.ignore_patterns("*.idx.json", "*.bundle"))
+    bundle_folder = str(tmp_path / "bundles")
+    registry = DatasetRegistry(str(folder), bundle_folder=bundle_folder)
+    assert registry.validate_bundles() == {dataset: "missing"}
+
+    data_manager = registry.get(dataset)
+    assert data_manager.save_bundle()
+    assert registry.validate_bundles() == {dataset: "valid"}
+    # A registry without the bundle folder does not see the bundle
+    assert DatasetRegistry(str(folder)).validate_bundles() == {dataset: "missing"}
+
+    with open(folder / dataset / f"good_k_{dataset}.txt", "a") as f:
+        f.write("\n")
+    assert registry.validate_bundles() == {dataset: "stale"}
@@ -0,0 +1,53 @@
+import os
+import shutil
+
+import pytest
+
+from controller.callbacks_manager import CallbacksManager
+from model.dataset_registry import DatasetRegistry
+
+
+@pytest.fixture
+def data_copy(data_folder, dataset, tmp_path):
+    folder = tmp_path / "data"
+    shutil.copytree(os.path.join(data_folder, dataset), folder / dataset,
+                    ignore=shutil.ignore_patterns("*.idx.json", "*.bundle"))
+    return str(folder)
+
+
+def rewrite_good_k(folder, dataset):
+    path = os.path.join(folder, dataset, f"good_k_{dataset}.txt")
+    with open(path, "a") as f:
+        f.write("\n")
+
+
+def test_get_catches_up_with_a_session_version(data_copy, dataset, tmp_path):
+    # Two server processes sharing the data folder
+    first = DatasetRegistry(data_copy, bundle_folder=str(tmp_path / "bundles"))
+    second = DatasetRegistry(data_copy, bundle_folder=str(tmp_path / "bundles"))
+    old = first.get(dataset)
+    rewrite_good_k(data_copy, dataset)
+    new_version = second.load(dataset).get_version()
+    assert new_version != old.get_version()
+
+    # Without a version the process keeps serving what it holds
+    assert first.get(dataset) is old
+    current = first.get(dataset, new_version)
+    assert current is not old and current.get_version() == new_version
+    assert first.get(dataset, new_version) is current
+    # A session given an older version gets the current files, not a reload per request
+    assert first.get(dataset, old.get_version()) is current
+
+
+def test_callbacks_reload_the_session_version(data_copy, dataset, tmp_path):
+    registry = DatasetRegistry(data_copy, bundle_folder=str(tmp_path / "bundles"))
+    callbacks = CallbacksManager(None, registry, None)
+    old = registry.get(dataset)
+    rewrite_good_k(data_copy, dataset)
+    new_version = DatasetRegistry(data_copy).load(dataset).get_version()
+
+    assert callbacks.get_session_dataset({"dataset": dataset, "version": new_version}) == dataset
+    assert registry.datasets[dataset] is not old
+    assert registry.datasets[dataset].get_version() == new_version
+    assert callbacks.get_session_dataset({"dataset": None, "version": None}) is None
+    assert callbacks.get_session_dataset(None) is None
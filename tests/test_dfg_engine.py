@@ -0,0 +1,121 @@
+import pandas as pd
+import pytest
+
+from baseline import cluster_dfg
+
+
+def cluster_dfgs(data_manager, k):
+    order = data_manager.get_cluster_order(k)
+    return data_manager.get_dfg_engine().compute_ordered(data_manager.get_cluster_labels(k), order)
+
+
+def check_against_baseline(data_manager, ks):
+    unique_sequences = pd.read_csv(data_manager.file_paths["unique_sequences"])
+    clustering = data_manager.data["clustering"]
+    for k in ks:
+        order = data_manager.get_cluster_order(k)
+        dfgs = cluster_dfgs(data_manager, k)
+        members = clustering.members(k)
+        assert len(dfgs) == len(order)
+        for index, cluster_id in enumerate(order):
+            nodes, edges = cluster_dfg(unique_sequences, members[cluster_id])
+            assert dfgs.nodes(index) == nodes
+            assert dfgs.edges(index) == edges
+
+
+def test_matches_baseline_fixture(data_manager):
+    check_against_baseline(data_manager, [1, 2, 5, 13, 25])
+
+
+def test_matches_baseline_road_traffic(road_traffic):
+    check_against_baseline(road_traffic, [2, 3, 30, 150])
+
+
+def test_start_and_end_activities(data_manager):
+    store = data_manager.get_sequence_store()
+    labels = data_manager.get_cluster_labels(5)
+    dfgs = data_manager.get_dfg_engine().compute(labels, int(labels.max()) + 1)
+    for cluster_id in range(len(dfgs)):
+        starts, ends = {}, {}
+        for row in range(len(store)):
+            if labels[row] == cluster_id:
+                sequence = store.sequence(row).tolist()
+                starts[sequence[0]] = starts.get(sequence[0], 0) + int(store.frequencies[row])
+                ends[sequence[-1]] = ends.get(sequence[-1], 0) + int(store.frequencies[row])
+        assert dfgs.starts(cluster_id) == starts
+        assert dfgs.ends(cluster_id) == ends
+
+
+def test_unclustered_sequences_are_ignored(data_manager):
+    engine = data_manager.get_dfg_engine()
+    labels = data_manager.get_cluster_labels(5).astype("int64").copy()
+    full = engine.compute(labels, int(labels.max()) + 1)
+    assert full.nodes(1)
+    labels[labels == 1] = -1
+    partial = engine.compute(labels, int(labels.max()) + 1)
+    assert partial.nodes(1) == {} and partial.edges(1) == {}
+    assert partial.nodes(2) == full.nodes(2) and partial.edges(2) == full.edges(2)
+
+
+def isolated(nodes, edges):
+    linked = {event for edge in edges for event in edge}
+    return set(nodes) - linked
+
+
+def check_connected(dfgs, index, nodes, edges):
+    # Nodes without edges in the full DFG of the cluster (single event sequences only) stay isolated
+    assert isolated(nodes, edges) <= isolated(dfgs.nodes(index), dfgs.edges(index))
+    assert set(dfgs.starts(index)) <= set(nodes)
+    assert set(dfgs.ends(index)) <= set(nodes)
+    assert all(source in nodes and target in nodes for source, target in edges)
+    # Every kept node is reached from a start activity along kept edges
+    reached, frontier = set(dfgs.starts(index)), list(dfgs.starts(index))
+    while frontier:
+        event = frontier.pop()
+        for source, target in edges:
+            if source == event and target not in reached:
+                reached.add(target)
+                frontier.append(target)
+    assert reached == set(nodes)
+
+
+@pytest.mark.parametrize("k, index, pruning", [
+    (3, 1, (("top", 3), None)),
+    (30, 28, (("top", 2), None)),
+    (68, 0, (("top", 2), ("top", 1))),
+    (10, 0, (("percent", 50), ("percent", 50))),
+])
+def test_keep_connected_road_traffic(road_traffic, k, index, pruning):
+    dfgs = cluster_dfgs(road_traffic, k)
+    nodes, edges = dfgs.prune(index, *pruning, keep_connected=True)
+    check_connected(dfgs, index, nodes, edges)
+    # "Create Fine" starts every case
+    assert 1 in nodes
+
+
+def test_keep_connected_fixture(data_manager):
+    for k in (1, 5, 25):
+        dfgs = cluster_dfgs(data_manager, k)
+        for index in range(len(dfgs)):
+            for pruning in ((("top", 1), None), (("top", 2), ("top", 1)), (("percent", 80), ("percent", 80))):
+                nodes, edges = dfgs.prune(index, *pruning, keep_connected=True)
+                check_connected(dfgs, index, nodes, edges)
+
+
+def test_prune_without_keep_connected(data_manager):
+    dfgs = cluster_dfgs(data_manager, 5)
+    full_nodes, full_edges = dfgs.nodes(0), dfgs.edges(0)
+    assert dfgs.prune(0) == (full_nodes, full_edges)
+    nodes, edges = dfgs.prune(0, ("top", 2), ("top", 1))
+    assert nodes == dict(sorted(full_nodes.items(), key=lambda item: -item[1])[:2])
+    assert len(edges) <= 1
+    assert all(full_edges[edge] == count for edge, count in edges.items())
+
+
+def test_top_threshold_below_one_keeps_nothing(data_manager):
+    dfgs = cluster_dfgs(data_manager, 5)
+    for value in (0, -1, -100):
+        nodes, edges = dfgs.prune(0, ("top", value), ("top", value))
+        assert nodes == {} and edges == {}
+    nodes, edges = dfgs.prune(0, None, ("top", -1))
+    assert nodes == dfgs.nodes(0) and edges == {}
@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from model.event_log_ingestor import EventLogIngestor
+
+
+def write_log(path, rows):
+    pd.DataFrame(rows, columns=["case_id", "activity", "timestamp"]).to_csv(path, index=False)
+    return str(path)
+
+
+def read_variants(folder, dataset):
+    types = pd.read_csv(os.path.join(folder, dataset, f"event_types_{dataset}.csv"))
+    names = dict(zip(types["id_eventType"], types["type"]))
+    sequences = pd.read_csv(os.path.join(folder, dataset, f"unique_sequences_{dataset}.csv"))
+    return {tuple(names[int(event)] for event in sequence.split("-")): frequency
+            for sequence, frequency in zip(sequences["sequence"], sequences["frequency"])}
+
+
+def reference_variants(log):
+    log = log.dropna(subset=["case_id", "activity"])
+    log = log.assign(timestamp=pd.to_datetime(log["timestamp"])).sort_values(["case_id", "timestamp"], kind="stable")
+    return log.groupby("case_id", sort=False)["activity"].agg(tuple).value_counts().to_dict()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000])
+def test_variants_match_reference(tmp_path, chunk_size):
+    rng = np.random.default_rng(0)
+    lengths = rng.integers(1, 8, 60)
+    cases = np.repeat(np.arange(60), lengths)
+    steps = np.concatenate([np.arange(length) for length in lengths])
+    log = pd.DataFrame({
+        "case_id": [f"c{case}" for case in cases],
+        "activity": [f"a{activity}" for activity in rng.integers(0, 4, len(cases))],
+        "timestamp": pd.to_datetime(rng.integers(0, 10 ** 6, 60)[cases] + steps * 60, unit="s"),
+    })
+    # Ordered by time, so cases are spread over many chunks
+    log = log.sort_values("timestamp", kind="stable")
+    path = write_log(tmp_path / "log.csv", log)
+
+    stats = EventLogIngestor(chunk_size=chunk_size).ingest(path, str(tmp_path), "Log")
+    variants = read_variants(str(tmp_path), "Log")
+    assert variants == reference_variants(log)
+    assert stats["events"] == len(log)
+    assert stats["cases"] == 60
+    assert stats["variants"] == len(variants)
+    assert sum(variants.values()) == 60
+
+
+def test_chunk_is_sorted_by_timestamp_with_ties_in_log_order(tmp_path):
+    path = write_log(tmp_path / "log.csv", [
+        ["1", "b", "2024-01-01 10:00"],
+        ["1", "a", "2024-01-01 09:00"],
+        ["2", "c", "2024-01-01 09:00"],
+        ["2", "d", "2024-01-01 09:00"],
+        [None, "x", "2024-01-01 09:00"],
+        ["3", None, "2024-01-01 09:00"],
+    ])
+    EventLogIngestor().ingest(path, str(tmp_path), "Log")
+    assert read_variants(str(tmp_path), "Log") == {("a", "b"): 1, ("c", "d"): 1}
+    types = pd.read_csv(os.path.join(str(tmp_path), "Log", "event_types_Log.csv"))
+    assert types["type"].tolist() == ["b", "a", "c", "d"]
+
+
+def test_most_frequent_variants_first(tmp_path):
+    rows = [[f"{case}", activity, f"2024-01-01 0{step}:00"]
+            for case, variant in enumerate(["xy", "z", "z", "xy", "z"]) for step, activity in enumerate(variant)]
+    EventLogIngestor().ingest(write_log(tmp_path / "log.csv", rows), str(tmp_path), "Log")
+    sequences = pd.read_csv(os.path.join(str(tmp_path), "Log", "unique_sequences_Log.csv"))
+    assert sequences["id_uniqueSeq"].tolist() == [1, 2]
+    assert sequences["frequency"].tolist() == [3, 2]
+
+
+def test_case_going_back_in_time_across_chunks(tmp_path):
+    path = write_log(tmp_path / "log.csv", [
+        ["1", "a", "2024-01-01 10:00"],
+        ["2", "a", "2024-01-01 10:00"],
+        ["1", "b", "2024-01-01 09:00"],
+    ])
+    with pytest.raises(ValueError, match="case 1"):
+        EventLogIngestor(chunk_size=2).ingest(path, str(tmp_path), "Log")
+    # Within one chunk the events are sorted
+    EventLogIngestor(chunk_size=3).ingest(path, str(tmp_path), "Log")
+    assert read_variants(str(tmp_path), "Log") == {("b", "a"): 1, ("a",): 1}
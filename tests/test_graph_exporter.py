@@ -0,0 +1,26 @@
+import json
+import os
+
+from model.dataset_registry import DatasetRegistry
+from view.graph_exporter import GraphExporter
+
+
+def test_cyjs_keeps_classes_and_inlines_style(data_folder, dataset, tmp_path):
+    exporter = GraphExporter(DatasetRegistry(data_folder), str(tmp_path), ("cyjs",), max_workers=1)
+    exporter.export(dataset, [5])
+    with open(os.path.join(tmp_path, dataset, "k_5.cyjs"), encoding="utf-8") as f:
+        graphs = json.load(f)
+    data_manager = exporter.registry.get(dataset)
+    colours = exporter.graph_builder.get_event_type_colors(data_manager)
+    acronyms = data_manager.get_event_types_acronyms()
+    assert len(graphs) == exporter.graph_builder.get_cluster_count(dataset, 5)
+    for graph in graphs:
+        for node in graph["elements"]["nodes"]:
+            event = node["data"]["id"]
+            assert node["classes"].startswith("t")
+            assert node["data"]["label"] == acronyms[event]
+            assert node["data"]["color"] == colours[event]
+    # The classes refer to the selectors of the exported stylesheet
+    with open(os.path.join(tmp_path, dataset, "style.json"), encoding="utf-8") as f:
+        selectors = {rule["selector"] for rule in json.load(f)[0]["style"]}
+    assert all(f".{node['classes']}" in selectors for graph in graphs for node in graph["elements"]["nodes"])
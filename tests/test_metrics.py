@@ -0,0 +1,23 @@
+from dash import Dash, html
+
+from utils import metrics
+from utils.metrics import Metrics
+
+
+def test_label_values_are_escaped():
+    registry = Metrics()
+    registry.observe("dfg_callback_seconds", {"callback": 'a\\b "c"\nd'}, 1.5)
+    assert 'dfg_callback_seconds_count{callback="a\\\\b \\"c\\"\\nd"} 1' in registry.render().splitlines()
+    assert Metrics.format_labels([]) == ""
+
+
+def test_profile_route_is_opt_in():
+    for profile_route in (False, True):
+        app = Dash(__name__)
+        app.layout = html.Div()
+        metrics.install(app, profile_route=profile_route)
+        client = app.server.test_client()
+        assert client.get("/metrics").status_code == 200
+        # Without the route, Dash answers the path with its index page
+        assert (client.get("/debug/profile").mimetype == "text/plain") == profile_route
+        assert client.post("/debug/profile").status_code == (200 if profile_route else 405)
@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from model.ngram_index import NgramIndex
+from model.sequence_store import SequenceStore
+
+
+def brute_force(store, pattern):
+    pattern = list(pattern)
+    matches = []
+    for row in range(len(store)):
+        sequence = store.sequence(row).tolist()
+        if any(sequence[i:i + len(pattern)] == pattern for i in range(len(sequence) - len(pattern) + 1)):
+            matches.append(row)
+    return matches
+
+
+def sample_patterns(store, seed=0):
+    rng = np.random.default_rng(seed)
+    patterns = []
+    for row in rng.choice(len(store), 40):
+        sequence = store.sequence(row).tolist()
+        length = int(rng.integers(1, len(sequence) + 1))
+        start = int(rng.integers(0, len(sequence) - length + 1))
+        patterns.append(sequence[start:start + length])
+    # Patterns made up from random events mostly match nothing
+    event_types = np.unique(store.events)
+    patterns += [rng.choice(event_types, int(rng.integers(1, 7))).tolist() for _ in range(40)]
+    return patterns
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 5])
+def test_search_matches_brute_force(data_manager, n):
+    store = data_manager.get_sequence_store()
+    index = NgramIndex(store, n)
+    for pattern in sample_patterns(store):
+        assert index.search(pattern).tolist() == brute_force(store, pattern)
+
+
+def test_edge_cases(data_manager):
+    store = data_manager.get_sequence_store()
+    index = data_manager.get_ngram_index()
+    longest = max(range(len(store)), key=lambda row: len(store.sequence(row)))
+    sequence = store.sequence(longest).tolist()
+
+    assert index.search([]).tolist() == []
+    # Unknown activities
+    for event in (0, -1, 999):
+        assert index.search([event]).tolist() == []
+        assert index.search(sequence[:2] + [event] + sequence[2:4]).tolist() == []
+    # A whole trace matches itself, one event more matches nothing
+    assert longest in index.search(sequence).tolist()
+    assert index.search(sequence + sequence[:1]).tolist() == brute_force(store, sequence + sequence[:1])
+    assert index.search(sequence * 3).tolist() == []
+
+
+def test_repeated_events():
+    store = SequenceStore([1, 2, 3], [1, 1, 1], [1, 1, 1, 1, 2, 1, 1, 2, 1, 2, 1, 1], [0, 4, 8, 12])
+    index = NgramIndex(store, n=2)
+    assert index.search([1, 1, 1, 1]).tolist() == [0]
+    assert index.search([1, 1, 1]).tolist() == [0]
+    assert index.search([1, 2, 1, 1]).tolist() == [2]
+    assert index.search([2, 1, 1, 2]).tolist() == [1]
+    assert index.search([2, 1, 2, 1]).tolist() == []
+    assert index.posting([1, 1]).tolist() == [0, 1, 2]
+
+
+def test_empty_store():
+    index = NgramIndex(SequenceStore([], [], [], [0]))
+    assert index.search([1]).tolist() == []
+    assert index.search([1, 2, 3, 4]).tolist() == []
+
+
+def test_parse_pattern(data_manager):
+    event_types = data_manager.get_event_types()
+    first, second, third = (event_types[event_id] for event_id in sorted(event_types)[:3])
+    expected = [int(event_id) for event_id in sorted(event_types)[:3]]
+    assert data_manager.parse_pattern(f"{first} -> {second} -> {third}") == expected
+    assert data_manager.parse_pattern(f"{first.upper()}\u2192{second.lower()},{third}") == expected
+    assert data_manager.parse_pattern("") == []
+    assert data_manager.parse_pattern(" -> , ") == []
+    with pytest.raises(ValueError, match="Unknown activity 'no such activity'"):
+        data_manager.parse_pattern(f"{first} -> No such activity")
+
+
+def test_parse_pattern_acronyms(road_traffic):
+    # RoadTraffic acronyms are unique: CF is Create Fine, SF Send Fine, PAY Payment
+    assert road_traffic.parse_pattern(" cf , SF ->PAY ") == [1, 2, 6]
+    assert road_traffic.parse_pattern("Create Fine -> sf") == [1, 2]
+
+
+def test_parse_pattern_ambiguous_acronym(data_manager):
+    # "Create Order" and "Check Order" are both CO
+    acronyms = data_manager.get_event_types_acronyms()
+    assert acronyms["Create Order"] == acronyms["Check Order"] == "CO"
+    with pytest.raises(ValueError, match="Ambiguous activity 'co'"):
+        data_manager.parse_pattern("CO -> Send Order")
+    assert data_manager.parse_pattern("Check Order -> Send Order") == [3, 2]
+
+
+def test_search_clusters(data_manager):
+    store = data_manager.get_sequence_store()
+    clustering = data_manager.data["clustering"]
+    for pattern in sample_patterns(store, seed=1)[:20]:
+        for k in (1, 5, 25):
+            labels = clustering.labels(k)
+            expected = {}
+            for row in brute_force(store, pattern):
+                if labels[row] >= 0:
+                    frequency, count = expected.get(int(labels[row]), (0, 0))
+                    expected[int(labels[row])] = (frequency + int(store.frequencies[row]), count + 1)
+            results = data_manager.search_clusters(pattern, k)
+            assert {cluster_id: (frequency, count) for cluster_id, frequency, count, _ in results} == expected
+            assert [frequency for _, frequency, _, _ in results] == sorted(expected_frequency for expected_frequency, _ in expected.values())[::-1]
+            totals = clustering.cluster_frequencies(k)
+            assert all(total == totals[cluster_id] for cluster_id, _, _, total in results)
+    assert data_manager.search_clusters([], 5) == []
+    assert data_manager.search_clusters([999], 5) == []
+    assert data_manager.search_clusters(sample_patterns(store)[0], 1000) == []
@@ -0,0 +1,43 @@
+import json
+import statistics
+
+import plotly
+import pytest
+
+from model.dataset_registry import DatasetRegistry
+from view.graph_builder import GraphBuilder
+
+BUDGET = 2048
+
+
+@pytest.fixture(scope="module")
+def graph_builder(road_traffic):
+    # Serves the RoadTraffic sample loaded by conftest, which leaves data/ untouched
+    registry = DatasetRegistry(road_traffic.data_root, mmap_bundle=False)
+    registry.datasets["RoadTraffic"] = road_traffic
+    return GraphBuilder(registry)
+
+
+def test_mean_bytes_per_graph_within_budget(graph_builder):
+    data_manager = graph_builder.registry.get("RoadTraffic")
+    sizes = []
+    for k in sorted(data_manager.data["clustering"].keys()):
+        for i in range(graph_builder.get_cluster_count("RoadTraffic", k)):
+            # Serialized the way Dash sends component props, see benchmarks/bench_payload.py
+            graph = graph_builder.create_graph(i, graph_builder.get_graph_data("RoadTraffic", k, i)).to_plotly_json()
+            sizes.append(len(json.dumps(graph, cls=plotly.utils.PlotlyJSONEncoder).encode()))
+    # Every cluster of every k
+    assert len(sizes) == 26565
+    assert statistics.mean(sizes) <= BUDGET
+
+
+def test_graphs_leave_styling_to_the_stylesheet(graph_builder):
+    graph_data = graph_builder.get_graph_data("RoadTraffic", 5, 0)
+    nodes = [element for element in graph_data["elements"] if "source" not in element["data"]]
+    edges = [element for element in graph_data["elements"] if "source" in element["data"]]
+    assert nodes and edges
+    assert all(set(element["data"]) == {"id", "frequency", "size"} for element in nodes)
+    assert all(set(element["data"]) == {"source", "target", "weight", "size"} for element in edges)
+    assert not any("style" in element for element in graph_data["elements"])
+    selectors = {rule["selector"] for rule in graph_builder.get_stylesheet("RoadTraffic")}
+    assert all(f".{element['classes']}" in selectors for element in nodes)
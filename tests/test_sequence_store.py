@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from model.sequence_store import SequenceStore
+
+
+@pytest.fixture
+def unique_sequences(data_manager):
+    return pd.read_csv(data_manager.file_paths["unique_sequences"])
+
+
+def test_rows_match_source_file(data_manager, unique_sequences):
+    store = data_manager.get_sequence_store()
+    assert len(store) == len(unique_sequences)
+    for id, frequency, sequence in unique_sequences[["id_uniqueSeq", "frequency", "sequence"]].itertuples(index=False):
+        row = store.rows([id])[0]
+        assert store.ids[row] == id
+        assert store.frequency([id])[0] == frequency
+        assert store.sequence(row).tolist() == [int(event) for event in sequence.split('-')]
+
+
+def test_dataframe_round_trip(unique_sequences):
+    store = SequenceStore.from_dataframe(unique_sequences)
+    df = store.to_dataframe()
+    assert df["id_uniqueSeq"].tolist() == unique_sequences["id_uniqueSeq"].tolist()
+    assert df["frequency"].tolist() == unique_sequences["frequency"].tolist()
+    assert df["sequence"].tolist() == unique_sequences["sequence"].astype(str).tolist()
+
+
+def test_total_frequency(data_manager, unique_sequences):
+    store = data_manager.get_sequence_store()
+    ids = unique_sequences["id_uniqueSeq"].to_numpy()[::7]
+    expected = unique_sequences.set_index("id_uniqueSeq").loc[ids, "frequency"].sum()
+    assert store.total_frequency(ids) == expected
+    assert store.total_frequency([]) == 0
+
+
+def test_unknown_ids_raise():
+    store = SequenceStore([3, 5], [1, 2], [1, 2, 2], [0, 2, 3])
+    assert store.rows([5, 3]).tolist() == [1, 0]
+    for ids in ([4], [-1], [6]):
+        with pytest.raises(KeyError):
+            store.rows(ids)
+
+
+def test_arrays_are_read_only():
+    store = SequenceStore([1], [1], [1, 2], [0, 2])
+    with pytest.raises(ValueError):
+        store.events[0] = 3
+    assert store.lengths().tolist() == [2]
+    assert isinstance(store.sequence(0), np.ndarray)
@@ -0,0 +1,152 @@
+import io
+import os
+import time
+import pstats
+import cProfile
+import threading
+import functools
+
+# Instrumentation is opt-in, without DFG_METRICS=1 the decorators return the functions unchanged
+ENABLED = os.environ.get("DFG_METRICS", "") not in ("", "0", "false")
+# The /debug/profile route is only served in debug mode or with DFG_PROFILE=1
+PROFILE = os.environ.get("DFG_PROFILE", "") not in ("", "0", "false")
+
+
+class Metrics:
+    """
+    In-process counters for timed stages, callbacks and response sizes, rendered as Prometheus text.
+    """
+
+    def __init__(self):
+        self.summaries = {}
+        self.collectors = []
+        self.lock = threading.Lock()
+        # Background callbacks run in forked processes, which must not inherit a held lock
+        os.register_at_fork(after_in_child=self.reset_lock)
+
+    def reset_lock(self):
+        self.lock = threading.Lock()
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            count, total = self.summaries.get(key, (0, 0.0))
+            self.summaries[key] = (count + 1, total + value)
+
+    def add_collector(self, collector):
+        # collector() returns {metric name: value} read at scrape time, names ending in _total are counters
+        self.collectors.append(collector)
+
+    @staticmethod
+    def escape(value):
+        # Label values escape backslashes, double quotes and line feeds in the Prometheus text format
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    @classmethod
+    def format_labels(cls, labels):
+        return "{" + ",".join(f'{name}="{cls.escape(value)}"' for name, value in labels) + "}" if labels else ""
+
+    def render(self):
+        lines = []
+        with self.lock:
+            summaries = dict(self.summaries)
+        for name in sorted({name for name, _ in summaries}):
+            lines.append(f"# TYPE {name} summary")
+            for (metric, labels), (count, total) in sorted(summaries.items()):
+                if metric == name:
+                    lines.append(f"{name}_count{self.format_labels(labels)} {count}")
+                    lines.append(f"{name}_sum{self.format_labels(labels)} {total:.6f}")
+        for collector in self.collectors:
+            for name, value in sorted(collector().items()):
+                lines.append(f"# TYPE {name} {'counter' if name.endswith('_total') else 'gauge'}")
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def timed(stage):
+    """
+    Record the duration of every call of the decorated function as dfg_stage_seconds{stage=...}.
+    """
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metrics.observe("dfg_stage_seconds", {"stage": stage}, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def install(app, collectors=(), profile_route=False):
+    """
+    Time every callback request of a Dash app and add the /metrics route to its server.
+
+    With profile_route, /debug/profile is added too: POST profiles the next callback request,
+    GET returns its pstats report.
+    """
+    from flask import g, request, Response
+
+    server = app.server
+    profile = {"armed": False, "report": "No profile captured yet\n"}
+    profile_lock = threading.Lock()
+    for collector in collectors:
+        metrics.add_collector(collector)
+
+    def callback_name():
+        # Requests name their callback by its output string, the registered function gives a readable label
+        body = request.get_json(silent=True) or {}
+        output = body.get("output", "")
+        callback = app.callback_map.get(output, {}).get("callback")
+        return getattr(callback, "__name__", None) or output
+
+    @server.before_request
+    def start_timer():
+        if request.path != "/_dash-update-component":
+            return
+        g.metrics_start = time.perf_counter()
+        with profile_lock:
+            armed, profile["armed"] = profile["armed"], False
+        if armed:
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    @server.after_request
+    def record_callback(response):
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return response
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            report = io.StringIO()
+            pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(40)
+            profile["report"] = report.getvalue()
+        labels = {"callback": callback_name()}
+        metrics.observe("dfg_callback_seconds", labels, time.perf_counter() - start)
+        # Measured before compression, the size of the serialized callback output
+        if not response.direct_passthrough:
+            metrics.observe("dfg_callback_response_bytes", labels, len(response.get_data()))
+        return response
+
+    @server.route("/metrics")
+    def prometheus_metrics():
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+    if not profile_route:
+        return
+
+    @server.route("/debug/profile", methods=["GET", "POST"])
+    def capture_profile():
+        if request.method == "POST":
+            with profile_lock:
+                profile["armed"] = True
+            return Response("Profiling the next callback request\n", mimetype="text/plain")
+        return Response(profile["report"], mimetype="text/plain")
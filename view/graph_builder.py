@@ -1,40 +1,152 @@
 import dash_cytoscape as cyto
 import dash_bootstrap_components as dbc
 from utils.colours import ColorUtils
-from dash import dcc
+from view.graph_cache import GraphCache
+from view.layout_engine import LayeredLayout
+from utils.metrics import timed
+from dash import dcc, html
 import math
 
 class GraphBuilder:
-    def __init__(self, data_manager):
-        self.data_manager = data_manager
-        self.event_type_colors = {}
-        self.event_types = {}
-
-    def get_event_type_colors(self):
-        self.event_types = self.data_manager.get_event_types()
-        for key, value in self.event_types.items():
+    def __init__(self, registry, cache_max_bytes=256 * 1024 * 1024, page_size=10, server_layout=True):
+        # Datasets are looked up per call, so one builder and its cache serve every session
+        self.registry = registry
+        self.page_size = page_size
+        # Positions computed on the server are sent with a preset layout instead of running dagre in the browser
+        self.layout_engine = LayeredLayout() if server_layout else None
+        self.cache = GraphCache(cache_max_bytes)
+
+    def clone(self, registry):
+        # Builder with the same settings over another registry, starting from an empty cache
+        return GraphBuilder(registry, self.cache.max_bytes, self.page_size, self.layout_engine is not None)
+
+    def get_event_type_colors(self, data_manager):
+        event_type_colors = {}
+        for key, value in data_manager.get_event_types().items():
             index = int(key) - 1
-            self.event_type_colors[value] = ColorUtils.get_color(index)
+            event_type_colors[value] = ColorUtils.get_color(index)
+        return event_type_colors
+
+    @timed("get_cluster_dfgs")
+    def get_cluster_dfgs(self, dataset, k):
+        data_manager = self.registry.get(dataset)
+        # Serve repeat visits to a k from the cache
+        key = (dataset, data_manager.get_version(), k)
+        cluster_dfgs = self.cache.get(key)
+        if cluster_dfgs is not None:
+            return cluster_dfgs
+
+        # Get the cluster ordering and labels for the given k
+        order = data_manager.get_cluster_order(k)
+        labels = data_manager.get_cluster_labels(k)
+
+        # Compute the DFGs of all clusters in one pass
+        dfgs = data_manager.get_dfg_engine().compute_ordered(labels, order)
+
+        cluster_dfgs = {"order": order, "dfgs": dfgs}
+        self.cache.put(key, cluster_dfgs, size=dfgs.nbytes())
+        return cluster_dfgs
+
+    def get_cluster_order(self, dataset, k):
+        data_manager = self.registry.get(dataset)
+        # Cluster ids by rank, without computing the DFGs of k
+        key = (dataset, data_manager.get_version(), k, "order")
+        order = self.cache.get(key)
+        if order is None:
+            order = data_manager.get_cluster_order(k)
+            self.cache.put(key, order)
+        return order
+
+    def get_graph_data(self, dataset, k, index, pruning=None):
+        data_manager = self.registry.get(dataset)
+        # Graphs are cached per member set, so a cluster left unchanged by a k step reuses the graph built for it
+        cluster_id = self.get_cluster_order(dataset, k)[index]
+        lineage = data_manager.get_cluster_lineage()
+        identity = ("members", *lineage.identity(k, cluster_id)) if lineage is not None else ("k", k, cluster_id)
+        key = (dataset, data_manager.get_version(), "graph", *identity, pruning)
+        graph_data = self.cache.get(key)
+        if graph_data is not None:
+            return graph_data
+
+        dfgs = self.get_cluster_dfgs(dataset, k)["dfgs"]
+        if pruning is None:
+            nodes_dict, edges_dict = dfgs.nodes(index), dfgs.edges(index)
+        else:
+            # pruning is a (node_threshold, edge_threshold, keep_connected) tuple, see ClusterDFGs.prune
+            nodes_dict, edges_dict = dfgs.prune(index, *pruning)
+        graph_data = self.create_graph_data(data_manager, nodes_dict, edges_dict)
+        self.cache.put(key, graph_data)
+        return graph_data
 
-    def get_graphs(self, k):
-        self.get_event_type_colors()
-        # Get clustering data for the given k
-        clustering_data = self.data_manager.get_clustering(k)
+    def get_cluster_lineage(self, dataset, k, index):
+        """
+        Describe where the members of a cluster come from at the previous k and go to at the next k.
 
-        # Build a cytoscape graph per key in clustering_data
+        Returns:
+            dict: previous_k, next_k and the parents and children of the cluster as (rank, share) lists,
+                with 1-based ranks as shown in the cluster titles and shares of the cluster frequency.
+        """
+        data_manager = self.registry.get(dataset)
+        lineage = data_manager.get_cluster_lineage()
+        description = {"previous_k": None, "next_k": None, "parents": [], "children": []}
+        if lineage is None:
+            return description
+        cluster_id = self.get_cluster_order(dataset, k)[index]
+        total = max(lineage.frequency(k, cluster_id), 1)
+        neighbours = (("previous_k", "parents", lineage.previous_k(k), lineage.parents(k, cluster_id)),
+                      ("next_k", "children", lineage.next_k(k), lineage.children(k, cluster_id)))
+        for k_name, name, other_k, related in neighbours:
+            if other_k is None:
+                continue
+            ranks = {other_id: rank for rank, other_id in enumerate(self.get_cluster_order(dataset, other_k), start=1)}
+            description[k_name] = other_k
+            description[name] = sorted(((ranks[other_id], weight / total) for other_id, weight in related.items()),
+                                       key=lambda item: -item[1])
+        return description
+
+    def get_cluster_count(self, dataset, k):
+        return len(self.get_cluster_order(dataset, k))
+
+    def get_page_count(self, dataset, k):
+        return max(1, math.ceil(self.get_cluster_count(dataset, k) / self.page_size))
+
+    def warm(self, dataset, k):
+        # Build what the first page of k needs, so moving the slider to k is served from the cache
+        for i in range(min(self.page_size, self.get_cluster_count(dataset, k))):
+            self.get_graph_data(dataset, k, i)
+
+    def invalidate_cache(self, dataset=None, keep_version=None):
+        self.cache.invalidate(dataset, keep_version)
+
+    def get_cache_stats(self):
+        return self.cache.stats()
+
+    def get_graphs(self, dataset, k, page=0, pruning=None):
+        # Only the clusters of the requested page are built, in frequency order
+        start = page * self.page_size
+        end = min(start + self.page_size, self.get_cluster_count(dataset, k))
+
+        # Build a cytoscape graph per cluster, using its rank instead of cluster_id as index
         graphs = []
-        for i, (key, value) in enumerate(clustering_data.items()):  # Use enumerate to get sequential index
-            graphs.append(self.create_graph(i, value))  # Pass sequential index instead of cluster_id
+        for i in range(start, end):
+            graphs.append(self.create_graph(i, self.get_graph_data(dataset, k, i, pruning)))
 
         rows = []
-        cluster_count = 1
-        for i, graph in enumerate(graphs):
+        cluster_count = start + 1
+        for i, graph in enumerate(graphs, start=start):
             # Create a row with the cluster title and fullscreen button
             title_row = dbc.Row([
                 dbc.Col([
                     dbc.Container([
                         dcc.Markdown(f"### Cluster {cluster_count}", 
+                                   id={"type": "cluster-title", "index": i},
                                    style={"textAlign":"center", "margin": "0", "display": "inline-block"}),
+                        # Hovering the title names the clusters this one splits into at the next k
+                        dbc.Tooltip(
+                            self.format_lineage(self.get_cluster_lineage(dataset, k, i)),
+                            target={"type": "cluster-title", "index": i},
+                            placement="top",
+                        ),
                         dbc.Button(
                             "Fullscreen",
                             id={"type": "fullscreen-btn", "index": i},
@@ -68,94 +180,69 @@ class GraphBuilder:
             
         return rows
 
-    def create_graph(self, cluster_id, ids):
-        # Get unique sequences
-        unique_sequences = self.data_manager.get_unique_sequences()
-        acronyms = self.data_manager.get_event_types_acronyms()
-        # Get sequences to create nodes and edges
-        nodes_dict = {}
-        edges_dict = {}
-        for id in ids:
-            # Get the sequence for the given id, where id_uniqueSeq == id
-            sequence = unique_sequences.loc[unique_sequences['id_uniqueSeq'] == int(id), 'sequence'].values[0]
-            frequency = unique_sequences.loc[unique_sequences['id_uniqueSeq'] == int(id), 'frequency'].values[0]
-            sequence = sequence.split('-')
-            # Get node frequencies
-            for event in sequence:
-                if event not in nodes_dict:
-                    nodes_dict[event] = frequency
-                else:
-                    nodes_dict[event] += frequency
-            # Get edges
-            for i in range(len(sequence) - 1):
-                edge = (sequence[i], sequence[i + 1])
-                if edge not in edges_dict:
-                    edges_dict[edge] = frequency
-                else:
-                    edges_dict[edge] += frequency
+    def get_search_results(self, dataset, k, text, limit=10):
+        # Clusters of k containing the activity pattern in text, by matching frequency
+        data_manager = self.registry.get(dataset)
+        try:
+            pattern = data_manager.parse_pattern(text)
+        except ValueError as e:
+            return dbc.Alert(str(e), color="warning", className="py-1 mb-0")
+        if not pattern:
+            return []
+        matches = data_manager.search_clusters(pattern, k)
+        if not matches:
+            return html.Div("No cluster contains this pattern")
 
-        # Change the node dictionary keys to their mapping in event_types
-        nodes_dict = {self.event_types[int(event)]: freq for event, freq in nodes_dict.items()}
-        # Change the edge dictionary keys to their mapping in event_types
-        edges_dict = {(self.event_types[int(edge[0])], self.event_types[int(edge[1])]): freq for edge, freq in edges_dict.items()}
-
-        # Calculate min and max frequencies for dynamic scaling
-        node_frequencies = list(nodes_dict.values())
-        edge_weights = list(edges_dict.values())
+        ranks = {cluster_id: rank for rank, cluster_id in enumerate(self.get_cluster_order(dataset, k))}
+        items = []
+        for cluster_id, frequency, sequences, total in matches[:limit]:
+            rank = ranks[cluster_id]
+            items.append(dbc.ListGroupItem(
+                f"Cluster {rank + 1} (page {rank // self.page_size + 1}): {frequency} matching cases in "
+                f"{sequences} variant{'s' if sequences > 1 else ''}, {frequency / max(total, 1):.1%} of the cluster"
+            ))
+        summary = html.Div(f"{len(matches)} cluster{'s' if len(matches) > 1 else ''} contain this pattern")
+        return [summary, dbc.ListGroup(items, flush=True)]
 
-        min_node_freq = min(node_frequencies) if node_frequencies else 1
-        max_node_freq = max(node_frequencies) if node_frequencies else 1
-        min_edge_weight = min(edge_weights) if edge_weights else 1
-        max_edge_weight = max(edge_weights) if edge_weights else 1
+    @staticmethod
+    def format_lineage(description):
+        def clusters(related):
+            return ", ".join(f"{rank} ({share:.0%})" for rank, share in related)
 
-        # Use logarithmic scaling for better distribution
-        log_min_node = math.log10(max(min_node_freq, 1))
-        log_max_node = math.log10(max_node_freq)
-        log_min_edge = math.log10(max(min_edge_weight, 1))
-        log_max_edge = math.log10(max_edge_weight)
-
-        # Create nodes and edges for cytoscape
-        nodes = []
-        for event, freq in nodes_dict.items():
-            color = self.event_type_colors[event]
-            log_freq = math.log10(max(freq, 1))
-            nodes.append({
-                "data": {
-                    "id": event,
-                    "label": acronyms[event],
-                    "frequency": freq,
-                    "log_frequency": log_freq,
-                    "color": color
-                },
-            })
+        lines = []
+        if description["children"]:
+            lines.append(f"At k={description['next_k']}: cluster{'s' if len(description['children']) > 1 else ''} "
+                         f"{clusters(description['children'])}")
+        if description["parents"]:
+            lines.append(f"At k={description['previous_k']}: from cluster{'s' if len(description['parents']) > 1 else ''} "
+                         f"{clusters(description['parents'])}")
+        return [html.Div(line) for line in lines] or "No other k values"
 
-        edges = []
-        for edge, freq in edges_dict.items():
-            log_weight = math.log10(max(freq, 1))
-            edges.append({
-                "data": {
-                    "source": edge[0],
-                    "target": edge[1],
-                    "weight": freq,  # Keep original for tooltip
-                    "log_weight": log_weight,  # Add logarithmic value for sizing
-                }
-            })
+    @staticmethod
+    def get_event_type_class(event_id):
+        return f"t{int(event_id)}"
 
-        elements = nodes + edges
+    def get_stylesheet(self, dataset):
+        data_manager = self.registry.get(dataset)
+        # One stylesheet serves every graph of a dataset version, it is sent to the browser once per load
+        key = (dataset, data_manager.get_version(), "stylesheet")
+        stylesheet = self.cache.get(key)
+        if stylesheet is not None:
+            return stylesheet
 
-        # Create the stylesheet with class-based coloring for each event type
+        event_type_colors = self.get_event_type_colors(data_manager)
+        acronyms = data_manager.get_event_types_acronyms()
+        # Sizes are normalized to 0..1 per graph on the log scale of its frequencies
         stylesheet = [
             {
                 "selector": "node",
                 "style": {
-                    "label": "data(label)",
                     "color": "#000000",
-                    "background-color": "data(color)",
                     "text-valign": "center",
                     "text-halign": "center",
-                    "width": f"mapData(log_frequency, {log_min_node}, {log_max_node}, 20, 80)",
-                    "height": f"mapData(log_frequency, {log_min_node}, {log_max_node}, 20, 80)",
-                    "font-size": f"mapData(log_frequency, {log_min_node}, {log_max_node}, 12, 16)"
+                    "width": "mapData(size, 0, 1, 20, 80)",
+                    "height": "mapData(size, 0, 1, 20, 80)",
+                    "font-size": "mapData(size, 0, 1, 12, 16)"
                 },
             },
             {
@@ -164,17 +251,84 @@ class GraphBuilder:
                     'target-arrow-shape': 'vee',
                     'curve-style': 'bezier',
                     'control-point-step-size': 50,
-                    "width": f"mapData(log_weight, {log_min_edge}, {log_max_edge}, 1, 8)",
+                    "width": "mapData(size, 0, 1, 1, 8)",
                     "line-color": "#ccc",
                     "target-arrow-color": "#ccc",
                 },
             },
         ]
+        # Colour and label come from the event type class of each node
+        for event_id, event in data_manager.get_event_types().items():
+            stylesheet.append({
+                "selector": "." + self.get_event_type_class(event_id),
+                "style": {"background-color": event_type_colors[event], "label": acronyms[event]},
+            })
+
+        self.cache.put(key, stylesheet)
+        return stylesheet
+
+    @staticmethod
+    def scale_sizes(values):
+        # Position of each value between the smallest and largest on a log scale, rounded to keep payloads small
+        logs = [math.log10(max(value, 1)) for value in values]
+        low, high = min(logs, default=0), max(logs, default=0)
+        if high == low:
+            return [1.0 for _ in logs]
+        return [round((log - low) / (high - low), 3) for log in logs]
+
+    @timed("create_graph_data")
+    def create_graph_data(self, data_manager, nodes_dict, edges_dict):
+        event_types = data_manager.get_event_types()
+        # Nodes are coloured and labelled by the class of their event type in the shared stylesheet
+        classes = {event_types[event]: self.get_event_type_class(event) for event in nodes_dict}
+
+        # Change the node dictionary keys to their mapping in event_types
+        nodes_dict = {event_types[event]: freq for event, freq in nodes_dict.items()}
+        # Change the edge dictionary keys to their mapping in event_types
+        edges_dict = {(event_types[edge[0]], event_types[edge[1]]): freq for edge, freq in edges_dict.items()}
+
+        # Create nodes and edges for cytoscape
+        nodes = []
+        for (event, freq), size in zip(nodes_dict.items(), self.scale_sizes(nodes_dict.values())):
+            nodes.append({
+                "data": {
+                    "id": event,
+                    "frequency": freq,
+                    "size": size,
+                },
+                "classes": classes[event],
+            })
+
+        edges = []
+        for (edge, freq), size in zip(edges_dict.items(), self.scale_sizes(edges_dict.values())):
+            edges.append({
+                "data": {
+                    "source": edge[0],
+                    "target": edge[1],
+                    "weight": freq,  # Keep original for tooltip
+                    "size": size,
+                }
+            })
+
+        elements = nodes + edges
+
+        # Place nodes on the server so the browser only has to paint them
+        if self.layout_engine is not None:
+            positions = self.layout_engine.compute(list(nodes_dict.keys()), edges_dict)
+            for node in nodes:
+                node["position"] = positions[node["data"]["id"]]
+            layout = {"name": "preset"}
+        else:
+            layout = {"name": "dagre", "rankDir": "LR"}
+
+        # Styles come from the dataset stylesheet, see get_stylesheet
+        return {"elements": elements, "layout": layout}
 
+    @timed("create_graph")
+    def create_graph(self, cluster_id, graph_data):
         return cyto.Cytoscape(
             id={"type": "graph", "index": cluster_id},
-            elements=elements,
-            layout={"name": "dagre", "rankDir": "LR"},
+            elements=graph_data["elements"],
+            layout=graph_data["layout"],
             style={"width": "100%", "height": "200px"},
-            stylesheet=stylesheet,
         )
\ No newline at end of file
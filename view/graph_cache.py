@@ -0,0 +1,81 @@
+import json
+import threading
+from collections import OrderedDict
+
+
+class GraphCache:
+    """
+    Thread-safe LRU cache of built cluster graphs, bounded by an approximate memory budget.
+
+    Keys are tuples starting with the dataset name and version, so the entries of
+    a dataset, or only its stale versions, can be dropped at once when it is reloaded.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value, size=None):
+        if size is None:
+            size = self.estimate_size(value)
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            # Entries larger than the whole budget are never stored
+            if size > self.max_bytes:
+                return
+            self.entries[key] = value
+            self.sizes[key] = size
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, dataset=None, keep_version=None):
+        # Keys are (dataset, version, ...); entries of keep_version survive the invalidation
+        with self.lock:
+            keys = [key for key in self.entries
+                    if (dataset is None or key[0] == dataset) and (keep_version is None or key[1] != keep_version)]
+            for key in keys:
+                self._remove(key)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _remove(self, key):
+        del self.entries[key]
+        self.current_bytes -= self.sizes.pop(key)
+
+    @staticmethod
+    def estimate_size(value):
+        # The serialized size approximates both memory use and the payload sent to the browser
+        return len(json.dumps(value, default=str))
@@ -0,0 +1,207 @@
+import os
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from model.dataset_registry import DatasetRegistry
+from view.graph_builder import GraphBuilder
+
+FORMATS = ("cyjs", "dot", "csv")
+
+# Exporter of the dataset being exported, set once per worker process
+_exporter = None
+
+
+def _init_export_worker(data_folder, dataset, output_folder, formats, chunk_size, cache_max_bytes):
+    global _exporter
+    # Workers attach the bundle compiled by the parent, no source file is parsed again
+    registry = DatasetRegistry(data_folder)
+    registry.load(dataset)
+    _exporter = GraphExporter(registry, output_folder, formats, chunk_size=chunk_size, cache_max_bytes=cache_max_bytes)
+
+
+def _export_ks(dataset, ks):
+    return _exporter.export_ks(dataset, ks)
+
+
+class GraphExporter:
+    """
+    Headless export of the cluster DFGs of a dataset, built the same way as the graphs of the app.
+
+    Every k gets one file per format holding all of its clusters in rank order:
+    Cytoscape JSON (k_<k>.cyjs, with the server-side layout positions), Graphviz
+    DOT (k_<k>.dot, one digraph per cluster) and a CSV edge list (k_<k>_edges.csv).
+    Runs of consecutive k values are exported on a process pool, so clusters left
+    unchanged between them are built once per worker, and each file is written
+    chunk_size clusters at a time.
+    """
+
+    def __init__(self, registry, output_folder="export/", formats=FORMATS, max_workers=None, chunk_size=100,
+                 cache_max_bytes=64 * 1024 * 1024):
+        unknown = set(formats) - set(FORMATS)
+        if unknown:
+            raise ValueError(f"Unknown export formats {sorted(unknown)}, expected some of {list(FORMATS)}")
+        self.registry = registry
+        self.output_folder = output_folder
+        self.formats = tuple(formats)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.cache_max_bytes = cache_max_bytes
+        self.graph_builder = GraphBuilder(registry, cache_max_bytes)
+
+    def dataset_folder(self, dataset):
+        return os.path.join(self.output_folder, dataset)
+
+    @staticmethod
+    def quote(text):
+        return '"' + str(text).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+    def to_cyjs(self, dataset, k, rank, graph_data, colours, acronyms):
+        # Classes match the exported style.json, the label and colour are also inlined for readers without it
+        nodes = [{**element, "data": {**element["data"], "label": acronyms[element["data"]["id"]],
+                                      "color": colours[element["data"]["id"]]}}
+                 for element in graph_data["elements"] if "source" not in element["data"]]
+        edges = [element for element in graph_data["elements"] if "source" in element["data"]]
+        return json.dumps({
+            "data": {"name": f"{dataset} k={k} cluster {rank}", "k": k, "cluster": rank},
+            "elements": {"nodes": nodes, "edges": edges},
+        })
+
+    def to_dot(self, k, rank, graph_data, colours, acronyms):
+        lines = [f"digraph {self.quote(f'k{k}_cluster{rank}')} {{", "  rankdir=LR;",
+                 "  node [shape=ellipse, style=filled];"]
+        for element in graph_data["elements"]:
+            data = element["data"]
+            if "source" in data:
+                lines.append(f"  {self.quote(data['source'])} -> {self.quote(data['target'])} "
+                             f"[label={data['weight']}, penwidth={1 + 4 * data['size']:.2f}];")
+            else:
+                event = data["id"]
+                label = f"{acronyms[event]} ({data['frequency']})"
+                lines.append(f"  {self.quote(event)} [label={self.quote(label)}, "
+                             f"tooltip={self.quote(event)}, fillcolor={self.quote(colours[event])}];")
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def to_csv(rank, graph_data):
+        rows = []
+        for element in graph_data["elements"]:
+            data = element["data"]
+            if "source" in data:
+                source, target = (str(name).replace('"', '""') for name in (data["source"], data["target"]))
+                rows.append(f'{rank},"{source}","{target}",{data["weight"]}\n')
+        return "".join(rows)
+
+    def export_k(self, dataset, k):
+        """
+        Write the DFGs of every cluster of k in the selected formats.
+
+        Returns:
+            tuple: Number of clusters and of bytes written.
+        """
+        data_manager = self.registry.get(dataset)
+        colours = self.graph_builder.get_event_type_colors(data_manager)
+        acronyms = data_manager.get_event_types_acronyms()
+        count = self.graph_builder.get_cluster_count(dataset, k)
+        folder = self.dataset_folder(dataset)
+        paths = {
+            "cyjs": os.path.join(folder, f"k_{k}.cyjs"),
+            "dot": os.path.join(folder, f"k_{k}.dot"),
+            "csv": os.path.join(folder, f"k_{k}_edges.csv"),
+        }
+        files = {name: open(paths[name], "w", encoding="utf-8", newline="") for name in self.formats}
+        try:
+            if "cyjs" in files:
+                files["cyjs"].write("[\n")
+            if "csv" in files:
+                files["csv"].write("cluster,source,target,frequency\n")
+            for start in range(0, count, self.chunk_size):
+                # Each file gets one write per chunk of clusters
+                chunks = {name: [] for name in files}
+                for index in range(start, min(start + self.chunk_size, count)):
+                    rank = index + 1
+                    graph_data = self.graph_builder.get_graph_data(dataset, k, index)
+                    if "cyjs" in chunks:
+                        cyjs = self.to_cyjs(dataset, k, rank, graph_data, colours, acronyms)
+                        chunks["cyjs"].append(("" if index == 0 else ",\n") + cyjs)
+                    if "dot" in chunks:
+                        chunks["dot"].append(self.to_dot(k, rank, graph_data, colours, acronyms))
+                    if "csv" in chunks:
+                        chunks["csv"].append(self.to_csv(rank, graph_data))
+                for name, parts in chunks.items():
+                    files[name].write("".join(parts))
+            if "cyjs" in files:
+                files["cyjs"].write("\n]\n")
+        finally:
+            for f in files.values():
+                f.close()
+        return count, sum(os.path.getsize(paths[name]) for name in files)
+
+    def export_ks(self, dataset, ks):
+        clusters, size = 0, 0
+        for k in ks:
+            k_clusters, k_size = self.export_k(dataset, k)
+            clusters += k_clusters
+            size += k_size
+        return len(ks), clusters, size
+
+    def runs(self, ks):
+        # Runs of consecutive k values with about the same number of clusters each, a few per worker
+        target = sum(ks) / (self.max_workers * 4)
+        runs, run, total = [], [], 0
+        for k in ks:
+            run.append(k)
+            total += k
+            if total >= target:
+                runs.append(run)
+                run, total = [], 0
+        if run:
+            runs.append(run)
+        return runs
+
+    def export(self, dataset, ks=None):
+        """
+        Export the cluster DFGs of a dataset for the given k values, or all of them.
+
+        Args:
+            dataset (str): Name of the dataset folder.
+            ks (list, optional): k values to export, every k of the clustering by default.
+
+        Returns:
+            dict: Number of k values, clusters and bytes written, and the elapsed seconds.
+        """
+        start = time.perf_counter()
+        data_manager = self.registry.load(dataset)
+        clustering = data_manager.data.get("clustering")
+        available = set(clustering.keys()) if clustering else set()
+        ks = sorted(available if ks is None else set(ks))
+        missing = [k for k in ks if k not in available]
+        if missing:
+            raise ValueError(f"Dataset {dataset} has no clustering for k = {missing}")
+
+        folder = self.dataset_folder(dataset)
+        os.makedirs(folder, exist_ok=True)
+        # Node colours and labels of the Cytoscape JSON files, shared by every graph like in the app
+        with open(os.path.join(folder, "style.json"), "w", encoding="utf-8") as f:
+            json.dump([{"format_version": "1.0", "title": dataset, "style": self.graph_builder.get_stylesheet(dataset)}], f)
+
+        runs = self.runs(ks)
+        totals = [0, 0, 0]
+        if self.max_workers == 1 or len(runs) <= 1:
+            for run in runs:
+                totals = [a + b for a, b in zip(totals, self.export_ks(dataset, run))]
+        else:
+            # Workers attach the compiled bundle instead of parsing the source files again
+            data_manager.save_bundle()
+            with ProcessPoolExecutor(self.max_workers, initializer=_init_export_worker,
+                                     initargs=(self.registry.data_root, dataset, self.output_folder, self.formats,
+                                               self.chunk_size, self.cache_max_bytes)) as executor:
+                for future in as_completed([executor.submit(_export_ks, dataset, run) for run in runs]):
+                    totals = [a + b for a, b in zip(totals, future.result())]
+
+        elapsed = time.perf_counter() - start
+        stats = {"ks": totals[0], "clusters": totals[1], "bytes": totals[2], "seconds": elapsed}
+        print(f"Exported {stats['clusters']} cluster DFGs of {stats['ks']} k values of {dataset} "
+              f"({stats['bytes'] / 1e6:.1f} MB) to {folder} in {elapsed:.1f}s")
+        return stats
@@ -0,0 +1,81 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class GraphWarmup:
+    """
+    Background pre-computation of cluster graphs for every k of a dataset.
+
+    Good k values are built first, then the remaining ones in ascending order.
+    Work runs on a small thread pool so request threads are never blocked, and a
+    running warm-up is cancelled as soon as another dataset starts warming up.
+    """
+
+    def __init__(self, graph_builder, max_workers=1):
+        self.graph_builder = graph_builder
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="graph-warmup")
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def get_warmup_order(self, data_manager):
+        ks = sorted(int(k) for k in data_manager.data["clustering"].keys())
+        available = set(ks)
+        good_k = [int(k) for k in (data_manager.get_good_k() or [])]
+        best_k = data_manager.get_best_k()
+        first = ([best_k] if best_k is not None else []) + good_k
+        # Keep the first occurrence of every k
+        ordered = list(dict.fromkeys(k for k in first if k in available))
+        seen = set(ordered)
+        return ordered + [k for k in ks if k not in seen]
+
+    def start(self, dataset):
+        data_manager = self.graph_builder.registry.get(dataset)
+        version = data_manager.get_version()
+        with self.lock:
+            job = self.jobs.get(dataset)
+            # A warm-up of the same dataset version is already running or done
+            if job is not None and job["version"] == version and not job["cancel"].is_set():
+                return job
+            # Only one dataset is warmed up at a time
+            for other in self.jobs.values():
+                other["cancel"].set()
+            ks = self.get_warmup_order(data_manager)
+            job = {"version": version, "ks": ks, "done": 0, "total": len(ks),
+                   "state": "running", "cancel": threading.Event()}
+            self.jobs[dataset] = job
+        self.executor.submit(self.run, dataset, job)
+        return job
+
+    def run(self, dataset, job):
+        evictions = self.graph_builder.get_cache_stats()["evictions"]
+        try:
+            for k in job["ks"]:
+                if job["cancel"].is_set():
+                    job["state"] = "cancelled"
+                    return
+                self.graph_builder.warm(dataset, k)
+                job["done"] += 1
+                # Stop once the cache budget is full, warming further would only evict earlier work
+                if self.graph_builder.get_cache_stats()["evictions"] > evictions:
+                    job["state"] = "budget"
+                    return
+            job["state"] = "done"
+        except Exception as e:
+            print(f"Failed to warm up graphs of {dataset}: {e}")
+            job["state"] = "failed"
+
+    def cancel(self, dataset=None):
+        with self.lock:
+            for name, job in self.jobs.items():
+                if dataset is None or name == dataset:
+                    job["cancel"].set()
+
+    def progress(self, dataset):
+        job = self.jobs.get(dataset)
+        if job is None:
+            return {"done": 0, "total": 0, "state": "idle"}
+        return {"done": job["done"], "total": job["total"], "state": job["state"]}
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False)
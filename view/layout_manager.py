@@ -1,18 +1,20 @@
+import uuid
+
 import dash_bootstrap_components as dbc
 from dash import html, dcc
 
 
 class LayoutManager:
 
-    def __init__(self, data_manager):
-        self.data_manager = data_manager
+    def __init__(self, registry):
+        self.registry = registry
 
     def get_layout(self):
         dropdown_dataset_col = dbc.Col([
             html.Label("Select Dataset: ", style={"fontSize": "16px", "marginBottom": "5px", "fontWeight": "bold"}),
             dcc.Dropdown(
                 id="dataset-selector",
-                options=self.data_manager.get_available_datasets(),
+                options=self.registry.get_available_datasets(),
                 placeholder="Select a dataset",
                 clearable=False,
                 style={"width": "200px"},
@@ -22,6 +24,9 @@ class LayoutManager:
         button_load_col = dbc.Col([
             dbc.Button("Load", id="load-dataset-button", n_clicks=0,
                        style={"marginTop": "30px", "marginLeft": "-50px", 'fontSize': '14px'}),
+            # Stage of the dataset load, only visible while it runs
+            dbc.Progress(id="load-progress", value=0, label="",
+                         style={"display": "none", "height": "16px", "marginTop": "5px", "marginLeft": "-50px"}),
         ], width=1)
         k_slider_col = dbc.Col([
             html.Label("Number of Clusters", style={"fontSize": "16px", "marginBottom": "5px", "fontWeight": "bold"}),
@@ -37,8 +42,64 @@ class LayoutManager:
                 updatemode="mouseup",
                 className="dbc",
             )
-        ], width=9)
-        
+        ], width=8)
+        # Progress of the background pre-computation of every k
+        warmup_col = dbc.Col([
+            html.Label("Precomputed", style={"fontSize": "16px", "marginBottom": "5px", "fontWeight": "bold"}),
+            dbc.Progress(id="warmup-progress", value=0, label="", style={"height": "20px", "marginTop": "8px"}),
+        ], width=1)
+
+        # Frequency thresholds applied to every cluster graph, empty keeps everything
+        pruning_row = dbc.Row([
+            dbc.Col([
+                html.Label("Threshold", style={"fontSize": "16px", "marginBottom": "5px", "fontWeight": "bold"}),
+                dbc.RadioItems(
+                    id="threshold-mode",
+                    options=[{"label": "Percent of max", "value": "percent"}, {"label": "Top N", "value": "top"}],
+                    value="percent",
+                    inline=True,
+                ),
+            ], width=3),
+            dbc.Col([
+                html.Label("Nodes", style={"fontSize": "16px", "marginBottom": "5px", "fontWeight": "bold"}),
+                dbc.Input(id="node-threshold", type="number", min=0, placeholder="All", debounce=True, size="sm"),
+            ], width=1),
+            dbc.Col([
+                html.Label("Edges", style={"fontSize": "16px", "marginBottom": "5px", "fontWeight": "bold"}),
+                dbc.Input(id="edge-threshold", type="number", min=0, placeholder="All", debounce=True, size="sm"),
+            ], width=1),
+            dbc.Col([
+                dbc.Checkbox(id="keep-connected", label="Keep connected", value=True, style={"marginTop": "30px"}),
+            ], width=2),
+        ], className="mt-2")
+
+        # Activity pattern search over the clusters of the current k
+        search_row = dbc.Row([
+            dbc.Col([
+                html.Label("Pattern", style={"fontSize": "16px", "marginBottom": "5px", "fontWeight": "bold"}),
+                dbc.Input(id="pattern-search", type="text", placeholder="Activity -> Activity -> ...",
+                          debounce=True, size="sm"),
+            ], width=4),
+            dbc.Col(html.Div(id="search-results", style={"marginTop": "30px"}), width=8),
+        ], className="mt-2")
+
+        # Clusters are shown one page at a time, most frequent first
+        pagination_row = dbc.Row(
+            dbc.Col(
+                dbc.Pagination(
+                    id="graph-pagination",
+                    max_value=1,
+                    active_page=1,
+                    first_last=True,
+                    previous_next=True,
+                    fully_expanded=False,
+                ),
+                width="auto",
+            ),
+            justify="center",
+            className="mt-2",
+        )
+
         graph_container = dbc.Container(
             id="graph-container",
             className="dbc"
@@ -98,6 +159,14 @@ class LayoutManager:
             disabled=True  # Start disabled
         )
 
+        # Add interval component polling the warm-up progress
+        warmup_interval = dcc.Interval(
+            id="warmup-interval",
+            interval=1000,  # 1 second
+            n_intervals=0,
+            disabled=True  # Enabled once a dataset is loaded
+        )
+
         # Add interval component for modal tooltip auto-hide
         modal_tooltip_interval = dcc.Interval(
             id="modal-tooltip-interval",
@@ -107,6 +176,16 @@ class LayoutManager:
         )
 
 
+        # Per-tab session state: which dataset (and version) this session works on
+        session_store = dcc.Store(
+            id="session-store",
+            storage_type="session",
+            data={"session_id": uuid.uuid4().hex, "dataset": None, "version": None},
+        )
+
+        # Stylesheet shared by every graph of the loaded dataset
+        stylesheet_store = dcc.Store(id="graph-stylesheet", storage_type="session")
+
         return dbc.Container([
             dbc.Row(
                 dcc.Markdown("# DFG", style={"textAlign": "center", "marginBottom": "10px", "marginTop": "5px"})
@@ -114,14 +193,21 @@ class LayoutManager:
             dbc.Row([
                 dropdown_dataset_col,
                 button_load_col,
-                k_slider_col
+                k_slider_col,
+                warmup_col
             ]),
+            pruning_row,
+            search_row,
+            pagination_row,
             dbc.Row(
                 tooltip_div,  # Add tooltip to layout
             ),
             dbc.Row(
                 graph_container
             ),
+            session_store,
+            stylesheet_store,
+            warmup_interval,
             tooltip_interval,
             modal_tooltip_interval,
             fullscreen_modal  # Add modal directly to layout